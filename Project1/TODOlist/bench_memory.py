@@ -0,0 +1,50 @@
+"""
+Memory benchmark: old per-task dicts vs storage.Task, and json.load vs
+the streaming snapshot reader.
+
+    python bench_memory.py            # 1,000,000 tasks
+    python bench_memory.py -n 200000
+"""
+import argparse
+import json
+import os
+import tempfile
+import tracemalloc
+from array import array
+
+import storage
+
+def measure(label, build):
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} final {current / 1e6:8.1f} MB   peak {peak / 1e6:8.1f} MB")
+    return result
+
+def old_load(path):
+    # what load_tasks() did before: json.load, then a normalized copy
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [{"text": t.get("text",""), "done": t.get("done", False)} for t in data["tasks"]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=1000000, help="number of tasks")
+    args = parser.parse_args()
+    n = args.n
+    print(f"{n:,} tasks")
+
+    measure("list of dicts", lambda: [{"text": f"task number {i}", "done": i % 3 == 0} for i in range(n)])
+    tasks = measure("list of Task", lambda: [storage.Task(f"task number {i}", i % 3 == 0) for i in range(n)])
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = storage.JournalStore(folder)
+        store.save(tasks, array("q", range(1, n + 1)))
+        del tasks
+        print(f"snapshot size {os.path.getsize(store.file_path) / 1e6:.1f} MB")
+        measure("json.load + dict copy (old)", lambda: old_load(store.file_path))
+        measure("read_snapshot (streaming)", lambda: storage.read_snapshot(store.file_path))
+
+if __name__ == "__main__":
+    main()
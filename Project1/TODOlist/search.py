@@ -0,0 +1,105 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from itertools import islice
+
+WORD_RE = re.compile(r"\w+")
+
+def words(text):
+    return set(WORD_RE.findall(text.lower()))
+
+class TaskIndex:
+    """
+    Inverted index over task text, kept up to date one task at a time.
+
+    Every word maps to the ids of the tasks containing it. The words are
+    also kept in a sorted list, so the last (half-typed) word of a query is
+    matched as a prefix by bisecting to the range of words that start with
+    it. Task ids grow with creation order, which is also list order, and
+    are kept sorted so that big result sets can be walked in that order.
+    """
+
+    def __init__(self):
+        self.by_word = {}
+        self.vocab = []     # sorted keys of by_word
+        self.text = {}      # task id -> indexed text
+        self.keys = array("q")  # sorted keys of text
+
+    def rebuild(self, pairs):
+        """Index (task id, text) pairs from scratch."""
+        self.__init__()
+        for key, text in pairs:
+            self.text[key] = text
+            for w in words(text):
+                self.by_word.setdefault(w, set()).add(key)
+        self.vocab = sorted(self.by_word)
+        self.keys = array("q", sorted(self.text))
+
+    def add(self, key, text):
+        self.text[key] = text
+        if self.keys and key < self.keys[-1]:
+            self.keys.insert(bisect_left(self.keys, key), key)
+        else:
+            self.keys.append(key)
+        self._link(key, text)
+
+    def discard(self, key):
+        del self.keys[bisect_left(self.keys, key)]
+        self._unlink(key, self.text.pop(key))
+
+    def reindex(self, key, text):
+        """Call after the text of task `key` changed to text."""
+        self._unlink(key, self.text[key])
+        self.text[key] = text
+        self._link(key, text)
+
+    def search(self, query, limit=500):
+        """
+        Ids of the tasks matching every word of query (the last one as a
+        prefix), in list order. Returns (total_matches, first `limit` ids).
+        """
+        parts = WORD_RE.findall(query.lower())
+        if not parts:
+            return 0, []
+        prefix = parts[-1]
+        start = bisect_left(self.vocab, prefix)
+        stop = bisect_left(self.vocab, prefix + "\U0010ffff", start)
+        postings = [self.by_word.get(w, ()) for w in parts[:-1]]
+        prefixed = [self.by_word[w] for w in self.vocab[start:stop]]
+        if not prefixed or not all(postings):
+            return 0, []
+        if len(prefixed) == 1 or not postings:
+            postings.append(prefixed[0] if len(prefixed) == 1 else set().union(*prefixed))
+            prefixed = None
+        # narrow from the smallest posting; none of them is copied
+        postings.sort(key=len)
+        hits = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+        if prefixed:
+            # merge the prefix words' postings if they are fewer than the
+            # hits, otherwise keep the hits that are in any of them
+            if sum(map(len, prefixed)) <= len(hits):
+                hits = hits.intersection(set().union(*prefixed))
+            else:
+                hits = set().union(*(hits.intersection(p) for p in prefixed))
+        if len(hits) * len(hits) <= limit * len(self.keys):
+            return len(hits), sorted(hits)[:limit]
+        # many hits: walking the list in order reaches `limit` of them sooner than sorting
+        return len(hits), list(islice(filter(hits.__contains__, self.keys), limit))
+
+    def _link(self, key, text):
+        for w in words(text):
+            keys = self.by_word.get(w)
+            if keys is None:
+                keys = self.by_word[w] = set()
+                insort(self.vocab, w)
+            keys.add(key)
+
+    def _unlink(self, key, text):
+        for w in words(text):
+            keys = self.by_word.get(w)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.by_word[w]
+                del self.vocab[bisect_left(self.vocab, w)]
@@ -0,0 +1,859 @@
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ---------------------------
+# Task
+# ---------------------------
+class Task:
+    """One to-do item. Slotted, so there is no per-instance __dict__; see
+    bench_memory.py for how it compares with the old per-task dicts."""
+    __slots__ = ("text", "done")
+
+    def __init__(self, text, done=False):
+        self.text = text
+        self.done = done
+
+    def to_dict(self):
+        return {"text": self.text, "done": self.done}
+
+    def __repr__(self):
+        return f"Task({self.text!r}, {self.done!r})"
+
+def task_from_dict(t):
+    return Task(t.get("text", ""), bool(t.get("done", False)))
+
+def new_id(last=0):
+    """
+    Id for a new task: microseconds since the epoch with 8 random bits
+    below, so instances adding at the same moment don't collide. Ids grow
+    over time, so a list kept in id order is also in creation order.
+    """
+    return max((time.time_ns() // 1000) << 8 | random.getrandbits(8), last + 1)
+
+def find(ids, task_id):
+    """Position of task_id in the sorted ids array, or None."""
+    i = bisect_left(ids, task_id)
+    return i if i < len(ids) and ids[i] == task_id else None
+
+# ---------------------------
+# Operations
+# ---------------------------
+# Every change to the list is described by a small dict naming the task by
+# id, so it means the same thing to every instance sharing the folder:
+#   {"op": "add", "id": ..., "text": ...}
+#   {"op": "edit", "id": ..., "text": ...}
+#   {"op": "delete", "id": ...}
+#   {"op": "toggle", "id": ..., "done": True/False}
+# Journals written by older versions use "i" (list position) instead of
+# "id" and have no "done" on toggles; apply_op still replays them.
+#
+# Tasks are kept in id order, with the ids in a parallel array("q").
+# The app applies an op in memory and hands the same dict to the store
+# through a BackgroundWriter, so the disk is never touched from the Tk
+# thread. A store provides:
+#   load()                   -> (tasks, ids)
+#   apply_many(ops)          -> (bytes written, external)
+#   sync()                   -> (0, external)
+#   snapshot(tasks, ids)     -> payload for write_snapshot, or None; called
+#                               on the Tk thread so it sees a consistent list
+#   write_snapshot(payload)  -> (bytes written, external)
+#   close()
+# where external lists the ops other instances wrote since the last call,
+# or is None when this instance can't catch up op by op and must reload.
+
+def apply_op(tasks, ids, op):
+    """Apply op in place. Returns the position it touched, or None if the
+    task is gone (or, for an add, already there)."""
+    kind = op["op"]
+    if kind == "add":
+        # old journals have no ids; number their adds the way load() numbers old snapshots
+        task_id = op.get("id") or (ids[-1] + 1 if ids else 1)
+        i = bisect_left(ids, task_id)
+        if i < len(ids) and ids[i] == task_id:
+            return None
+        ids.insert(i, task_id)
+        tasks.insert(i, Task(op["text"]))
+        return i
+    i = op["i"] if "i" in op else find(ids, op["id"])
+    if i is None:
+        return None
+    if kind == "edit":
+        tasks[i].text = op["text"]
+    elif kind == "delete":
+        tasks.pop(i)
+        ids.pop(i)
+    elif kind == "toggle":
+        t = tasks[i]
+        t.done = op["done"] if "done" in op else not t.done
+    return i
+
+def write_atomic(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(text.encode("utf-8"))
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock on path (created if missing) across processes."""
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10 s; keep waiting
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# ---------------------------
+# Streaming snapshot reader
+# ---------------------------
+# json.load() would hold the whole file text and a dict per task on top of
+# the final list; this decodes one task at a time from fixed-size chunks.
+# Accepts the current {"generation": n, "tasks": [...]} layout with any
+# whitespace, and the plain list written by older versions.
+
+class _Chunks:
+    def __init__(self, f, size=1 << 16):
+        self.f = f
+        self.size = size
+        self.buf = ""
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character ("" at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._more():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"Malformed snapshot: expected {ch!r}")
+        self.pos += 1
+
+    def value(self):
+        decoder = json.JSONDecoder()
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if not self._more():
+                    raise
+                continue
+            # a number could continue in the next chunk; strings/objects can't
+            if end == len(self.buf) and self._more():
+                continue
+            self.pos = end
+            return value
+
+    def _more(self):
+        data = self.f.read(self.size)
+        if not data:
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+def _iter_array(chunks):
+    chunks.expect("[")
+    if chunks.peek() == "]":
+        chunks.pos += 1
+        return
+    while True:
+        yield chunks.value()
+        if chunks.peek() == ",":
+            chunks.pos += 1
+        else:
+            chunks.expect("]")
+            return
+
+def iter_json_rows(f, info=None):
+    """
+    Yield the task dicts in an open snapshot (or plain JSON list) file one
+    at a time. If info is a dict, info["generation"] is set when it is read.
+    """
+    chunks = _Chunks(f)
+    if chunks.peek() == "[":
+        yield from _iter_array(chunks)
+        return
+    chunks.expect("{")
+    while chunks.peek() != "}":
+        key = chunks.value()
+        chunks.expect(":")
+        if key == "tasks":
+            yield from _iter_array(chunks)
+        elif key == "generation" and info is not None:
+            info["generation"] = chunks.value()
+        else:
+            chunks.value()
+        if chunks.peek() == ",":
+            chunks.pos += 1
+
+def iter_json_tasks(f, info=None):
+    for row in iter_json_rows(f, info):
+        yield task_from_dict(row)
+
+def iter_snapshot(path, info=None):
+    """Yield (id, task) pairs; snapshots from before ids are numbered 1, 2, 3..."""
+    with open(path, "r", encoding="utf-8") as f:
+        for n, row in enumerate(iter_json_rows(f, info), 1):
+            yield row.get("id", n), task_from_dict(row)
+
+def read_snapshot(path):
+    """Returns (generation, tasks, ids)."""
+    info = {}
+    tasks = []
+    ids = array("q")
+    for task_id, t in iter_snapshot(path, info):
+        ids.append(task_id)
+        tasks.append(t)
+    return info.get("generation", 0), tasks, ids
+
+def _regexp(pattern, flags=0):
+    return re.compile(pattern, flags).search
+
+# ---------------------------
+# JSON snapshot + journal
+# ---------------------------
+class JournalStore:
+    """
+    tasks.json holds a snapshot; every edit after it is appended to
+    tasks.journal as one JSON line, so a click costs one small write instead
+    of rewriting the whole file. The journal starts with a header naming the
+    snapshot generation it applies to; a journal left over from a compaction
+    that crashed halfway has an older generation and is ignored on load.
+
+    Several instances can share the folder. Appends and compactions happen
+    under tasks.lock, and before appending an instance reads whatever the
+    others appended since its last look, from the byte offset it had
+    reached. A compaction keeps the journal it replaced as
+    tasks.journal.prev, so instances that had not finished reading it can
+    still catch up instead of reloading.
+    """
+    COMPACT_EVERY = 1000
+
+    def __init__(self, folder):
+        self.file_path = os.path.join(folder, "tasks.json")
+        self.journal_path = os.path.join(folder, "tasks.journal")
+        self.prev_path = self.journal_path + ".prev"
+        self.lock_path = os.path.join(folder, "tasks.lock")
+        self.generation = 0      # generation of the journal being followed
+        self.offset = 0          # bytes of that journal already applied
+        self.journal_count = 0   # records replayed from the journal by load()
+
+    def load(self):
+        with locked(self.lock_path):
+            return self._load()
+
+    def _load(self):
+        tasks, ids = [], array("q")
+        self.generation = 0
+        if os.path.exists(self.file_path):
+            self.generation, tasks, ids = read_snapshot(self.file_path)
+        self.journal_count = 0
+        ops = self._read_journal(self.journal_path, self.generation, 0)
+        if ops is None:
+            # no journal yet, or a stale one already folded into the snapshot
+            self._start_journal(self.generation)
+            return tasks, ids
+        for op in ops:
+            apply_op(tasks, ids, op)
+        self.journal_count = len(ops)
+        if os.path.getsize(self.journal_path) > self.offset:
+            # torn last line from a crash mid-append; appends hold the lock,
+            # so nobody is still writing it
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(self.offset)
+        return tasks, ids
+
+    def apply_many(self, ops):
+        data = "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in ops).encode("utf-8")
+        with locked(self.lock_path):
+            external = self._read_tail()
+            if external is None:
+                return 0, None
+            with open(self.journal_path, "r+b") as f:
+                f.seek(self.offset)
+                f.truncate()    # drops a torn line left by a crashed instance
+                f.write(data)
+            self.offset += len(data)
+        return len(data), external
+
+    def sync(self):
+        if self._unchanged():
+            return 0, []
+        with locked(self.lock_path):
+            return 0, self._read_tail()
+
+    def snapshot(self, tasks, ids):
+        # one task per line keeps the file readable and diff-friendly
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        return ",\n".join([_encode_row(dumps, task_id, t) for task_id, t in zip(ids, tasks)])
+
+    def write_snapshot(self, rows):
+        """Fold the journal into a fresh snapshot (compaction)."""
+        with locked(self.lock_path):
+            external = self._read_tail()
+            if external or external is None:
+                # the rows don't include these yet; compact another time
+                return 0, external
+            generation = self.generation + 1
+            text = f'{{"generation": {generation}, "tasks": [\n{rows}\n]}}\n'
+            size = write_atomic(self.file_path, text)
+            return size + self._start_journal(generation, keep_prev=True), []
+
+    def save(self, tasks, ids):
+        self.write_snapshot(self.snapshot(tasks, ids))
+
+    def close(self):
+        pass
+
+    def _start_journal(self, generation, keep_prev=False):
+        if keep_prev and os.path.exists(self.journal_path):
+            os.replace(self.journal_path, self.prev_path)
+        elif os.path.exists(self.prev_path):
+            os.remove(self.prev_path)
+        size = write_atomic(self.journal_path, json.dumps({"generation": generation}) + "\n")
+        self.generation = generation
+        self.offset = size
+        return size
+
+    def _unchanged(self):
+        """Cheap check, without the lock, that nobody wrote since our last look."""
+        try:
+            return (os.path.getsize(self.journal_path) == self.offset
+                    and self._header_generation(self.journal_path) == self.generation)
+        except OSError:
+            return False
+
+    def _header_generation(self, path):
+        try:
+            with open(path, "rb") as f:
+                return json.loads(f.readline()).get("generation")
+        except (OSError, ValueError):
+            return None
+
+    def _read_journal(self, path, generation, offset):
+        """
+        The complete records of journal `path` after byte `offset`, or None
+        if it is missing or belongs to another generation. Sets self.offset
+        to the end of the last complete record.
+        """
+        if self._header_generation(path) != generation:
+            return None
+        ops = []
+        with open(path, "rb") as f:
+            f.readline()
+            self.offset = max(offset, f.tell())
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn
+                ops.append(json.loads(line))
+                self.offset += len(line)
+        return ops
+
+    def _read_tail(self):
+        """What other instances appended since our last look (lock held)."""
+        if self._unchanged() or not os.path.exists(self.journal_path):
+            return []
+        ops = []
+        current = self._header_generation(self.journal_path)
+        if current != self.generation:
+            # compacted by someone else: finish our generation from the old journal
+            if current != self.generation + 1:
+                return None
+            ops = self._read_journal(self.prev_path, self.generation, self.offset)
+            if ops is None:
+                return None
+            self.generation, self.offset = current, 0
+        tail = self._read_journal(self.journal_path, self.generation, self.offset)
+        if tail is None:
+            return None
+        return ops + tail
+
+    # --- bulk operations for the CLI: stream, never hold the whole list ---
+
+    def iter_tasks(self):
+        if self._journal_pending():
+            # fold the journal in memory first (old records are positional)
+            with locked(self.lock_path):
+                tasks, _ = self._load()
+            yield from tasks
+        elif os.path.exists(self.file_path):
+            for _, t in iter_snapshot(self.file_path):
+                yield t
+
+    def _iter_rows(self):
+        """(id, task) pairs; only call with the lock held."""
+        if self._journal_pending():
+            tasks, ids = self._load()
+            yield from zip(ids, tasks)
+        elif os.path.exists(self.file_path):
+            yield from iter_snapshot(self.file_path)
+
+    def rewrite(self, rows):
+        """
+        Stream (id, task) pairs from rows(), called with the lock held, into
+        a new snapshot. rows may read the current snapshot; it is only
+        replaced once fully written. The old journal is dropped, so running
+        instances find a generation they can't follow and reload.
+        """
+        with locked(self.lock_path):
+            generation = self._snapshot_generation() + 1
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+            tmp = self.file_path + ".tmp"
+            try:
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(f'{{"generation": {generation}, "tasks": [')
+                    sep = "\n"
+                    for task_id, t in rows():
+                        f.write(sep + _encode_row(dumps, task_id, t))
+                        sep = ",\n"
+                    f.write("\n]}\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except BaseException:
+                # e.g. rows() failing on a bad import: the snapshot stays as it was
+                os.remove(tmp)
+                raise
+            os.replace(tmp, self.file_path)
+            self._start_journal(generation)
+
+    def add_many(self, tasks):
+        added = 0
+        def rows():
+            nonlocal added
+            last = 0
+            for last, t in self._iter_rows():
+                yield last, t
+            for t in tasks:
+                last = new_id(last)
+                added += 1
+                yield last, t
+        self.rewrite(rows)
+        return added
+
+    def set_done_where(self, pattern, done=True, flags=0):
+        match = _regexp(pattern, flags)
+        changed = 0
+        def marked():
+            nonlocal changed
+            for task_id, t in self._iter_rows():
+                if t.done != done and match(t.text):
+                    t.done = done
+                    changed += 1
+                yield task_id, t
+        self.rewrite(marked)
+        return changed
+
+    def delete_where(self, pattern, flags=0):
+        match = _regexp(pattern, flags)
+        deleted = 0
+        def kept():
+            nonlocal deleted
+            for task_id, t in self._iter_rows():
+                if match(t.text):
+                    deleted += 1
+                else:
+                    yield task_id, t
+        self.rewrite(kept)
+        return deleted
+
+    def counts(self):
+        total = done = 0
+        for t in self.iter_tasks():
+            total += 1
+            done += t.done
+        return total, done
+
+    def _journal_pending(self):
+        if not os.path.exists(self.journal_path):
+            return False
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            f.readline()
+            return bool(f.readline())
+
+    def _snapshot_generation(self):
+        if not os.path.exists(self.file_path):
+            return max(self.generation, self._header_generation(self.journal_path) or 0)
+        info = {}
+        next(iter_snapshot(self.file_path, info), None)  # generation precedes the tasks
+        return info.get("generation", 0)
+
+def _encode_row(dumps, task_id, t):
+    return dumps({"id": task_id, "text": t.text, "done": t.done})
+
+# ---------------------------
+# SQLite
+# ---------------------------
+class SqliteStore:
+    """
+    One row per task in tasks.db, keyed by task id, so edits touch a single
+    row. SQLite handles the locking between instances; every write
+    transaction also records its ops in the changes table, which other
+    instances read from the last sequence number they saw. PRAGMA
+    data_version tells them cheaply whether there is anything to read.
+    """
+    COMPACT_EVERY = None
+    KEEP_CHANGES = 10000    # instances further behind than this reload
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS tasks_done ON tasks (done, id);
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.db_path = os.path.join(folder, "tasks.db")
+        fresh = not os.path.exists(self.db_path)
+        # opened here, used by the writer thread afterwards (never both at once);
+        # transactions are explicit so writes can take the lock up front
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                    isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.last_seq = 0       # last row of changes already applied
+        self.data_version = None
+        if fresh:
+            self._migrate_json()
+
+    @contextmanager
+    def _transaction(self, mode="IMMEDIATE"):
+        self.conn.execute("BEGIN " + mode)
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def _migrate_json(self):
+        """One-shot import of an existing tasks.json (and its journal)."""
+        old = JournalStore(self.folder)
+        if not os.path.exists(old.file_path) and not os.path.exists(old.journal_path):
+            return
+        with locked(old.lock_path), self._transaction():
+            self.conn.executemany("INSERT INTO tasks (id, text, done) VALUES (?, ?, ?)",
+                                  ((task_id, t.text, int(t.done)) for task_id, t in old._iter_rows()))
+        for path in (old.file_path, old.journal_path, old.prev_path):
+            if os.path.exists(path):
+                os.replace(path, path + ".migrated")
+
+    def load(self):
+        tasks, ids = [], array("q")
+        with self._transaction("DEFERRED"):
+            for task_id, text, done in self.conn.execute("SELECT id, text, done FROM tasks ORDER BY id"):
+                ids.append(task_id)
+                tasks.append(Task(text, bool(done)))
+            self.last_seq = self._max_seq()
+        self.data_version = self._data_version()
+        return tasks, ids
+
+    def apply_many(self, ops):
+        """All of ops in one transaction; returns the bytes of text stored."""
+        size = 0
+        with self._transaction():
+            external = self._read_tail()
+            for op in ops:
+                kind = op["op"]
+                if kind == "add":
+                    self.conn.execute("INSERT OR IGNORE INTO tasks (id, text) VALUES (?, ?)", (op["id"], op["text"]))
+                elif kind == "edit":
+                    self.conn.execute("UPDATE tasks SET text = ? WHERE id = ?", (op["text"], op["id"]))
+                elif kind == "delete":
+                    self.conn.execute("DELETE FROM tasks WHERE id = ?", (op["id"],))
+                elif kind == "toggle":
+                    self.conn.execute("UPDATE tasks SET done = ? WHERE id = ?", (int(op["done"]), op["id"]))
+                size += len(op.get("text", "").encode("utf-8"))
+            self._log(ops)
+        self.data_version = self._data_version()
+        return size, external
+
+    def sync(self):
+        if self._data_version() == self.data_version:
+            return 0, []
+        with self._transaction("DEFERRED"):
+            external = self._read_tail()
+        self.data_version = self._data_version()
+        return 0, external
+
+    def snapshot(self, tasks, ids):
+        return None
+
+    def write_snapshot(self, payload):
+        # every change is already committed; just fold the WAL back into the db
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return 0, []
+
+    def close(self):
+        self.write_snapshot(None)
+        self.conn.close()
+
+    def _data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _max_seq(self):
+        return self.conn.execute("SELECT coalesce(max(seq), 0) FROM changes").fetchone()[0]
+
+    def _read_tail(self):
+        rows = self.conn.execute("SELECT seq, op FROM changes WHERE seq > ? ORDER BY seq",
+                                 (self.last_seq,)).fetchall()
+        if not rows:
+            return []
+        # a gap means the rows we needed were pruned
+        behind = rows[0][0] != self.last_seq + 1
+        self.last_seq = rows[-1][0]
+        ops = [json.loads(op) for _, op in rows]
+        if behind or any(op["op"] == "reload" for op in ops):
+            return None
+        return ops
+
+    def _log(self, ops):
+        self.conn.executemany("INSERT INTO changes (op) VALUES (?)",
+                              ((json.dumps(op, ensure_ascii=False),) for op in ops))
+        self.last_seq = self._max_seq()
+        self.conn.execute("DELETE FROM changes WHERE seq <= ?", (self.last_seq - self.KEEP_CHANGES,))
+
+    # --- bulk operations for the CLI; running instances reload afterwards ---
+
+    def iter_tasks(self):
+        for text, done in self.conn.execute("SELECT text, done FROM tasks ORDER BY id"):
+            yield Task(text, bool(done))
+
+    def add_many(self, tasks):
+        with self._transaction():
+            last = self.conn.execute("SELECT coalesce(max(id), 0) FROM tasks").fetchone()[0]
+            def rows():
+                nonlocal last
+                for t in tasks:
+                    last = new_id(last)
+                    yield last, t.text, int(t.done)
+            cur = self.conn.executemany("INSERT INTO tasks (id, text, done) VALUES (?, ?, ?)", rows())
+            self._log([{"op": "reload"}])
+        return cur.rowcount
+
+    def set_done_where(self, pattern, done=True, flags=0):
+        self._register_pattern(pattern, flags)
+        with self._transaction():
+            cur = self.conn.execute("UPDATE tasks SET done = ? WHERE done != ? AND matches(text)",
+                                    (int(done), int(done)))
+            self._log([{"op": "reload"}])
+        return cur.rowcount
+
+    def delete_where(self, pattern, flags=0):
+        self._register_pattern(pattern, flags)
+        with self._transaction():
+            cur = self.conn.execute("DELETE FROM tasks WHERE matches(text)")
+            self._log([{"op": "reload"}])
+        return cur.rowcount
+
+    def _register_pattern(self, pattern, flags):
+        search = _regexp(pattern, flags)
+        self.conn.create_function("matches", 1, lambda text: search(text) is not None,
+                                  deterministic=True)
+
+    def counts(self):
+        """(total, done), answered from the indexes without reading any text."""
+        total = self.conn.execute("SELECT count(*) FROM tasks").fetchone()[0]
+        done = self.conn.execute("SELECT count(*) FROM tasks WHERE done = 1").fetchone()[0]
+        return total, done
+
+BACKENDS = {"json": JournalStore, "sqlite": SqliteStore}
+# ---------------------------
+# Background writer
+# ---------------------------
+class BackgroundWriter:
+    """
+    Runs a store's writes on one worker thread. Operations submitted while
+    a write is in progress are coalesced and handed to the store as a
+    single batch (one journal append or one SQLite transaction).
+
+    Edits by other instances come back from the store with each write, or
+    on request_sync(), and wait in `incoming` for the Tk thread (see
+    take_changes): ("ops", [op, ...]) to merge, or ("reload", (tasks, ids,
+    written)) when only a full reload will do, where `written` is how many
+    submitted ops the reloaded list already contains.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.queue = []             # ("ops", [op, ...]), ("snapshot", (taken, payload)) or ("sync", None)
+        self.incoming = queue.Queue()
+        self.cond = threading.Condition()
+        self.busy = False
+        self.closing = False
+        self.written = 0            # ops the store has written
+        self.posted = 0             # items put on incoming
+        self.taken = 0              # items the Tk thread has taken off it
+        self.since_snapshot = getattr(store, "journal_count", 0)
+        self.stats = {"writes": 0, "ops": 0, "bytes_written": 0,
+                      "last_write_ms": 0.0, "max_write_ms": 0.0, "total_write_ms": 0.0,
+                      "external_ops": 0, "reloads": 0, "errors": 0, "last_error": None}
+        self.thread = threading.Thread(target=self._run, name="task-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, op, tasks, ids):
+        """Queue op; tasks/ids are the list after op was applied in memory."""
+        with self.cond:
+            if self.queue and self.queue[-1][0] == "ops":
+                self.queue[-1][1].append(op)
+            else:
+                self.queue.append(("ops", [op]))
+            self.cond.notify()
+        self.since_snapshot += 1
+        limit = self.store.COMPACT_EVERY
+        if limit and self.since_snapshot >= limit:
+            self.save(tasks, ids)
+
+    def save(self, tasks, ids):
+        payload = self.store.snapshot(tasks, ids)
+        self.since_snapshot = 0
+        if payload is None:
+            return
+        with self.cond:
+            # tagged so it can be dropped if changes arrive that the list hasn't merged
+            self.queue.append(("snapshot", (self.taken, payload)))
+            self.cond.notify()
+
+    def request_sync(self):
+        """Have the worker look for edits by other instances, unless it is busy anyway."""
+        with self.cond:
+            if not self.queue and not self.busy:
+                self.queue.append(("sync", None))
+                self.cond.notify()
+
+    def take_changes(self):
+        """Drain incoming (Tk thread); the caller must merge everything returned."""
+        items = []
+        while True:
+            try:
+                items.append(self.incoming.get_nowait())
+            except queue.Empty:
+                self.taken += len(items)
+                return items
+
+    def flush(self):
+        """Block until everything submitted so far is on disk."""
+        with self.cond:
+            while self.queue or self.busy:
+                self.cond.wait()
+
+    def close(self, tasks, ids):
+        self.save(tasks, ids)
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join()
+        self.store.close()
+
+    def metrics(self):
+        with self.cond:
+            m = dict(self.stats)
+            m["pending"] = sum(len(item) if kind == "ops" else 1 for kind, item in self.queue)
+        m["avg_write_ms"] = m["total_write_ms"] / m["writes"] if m["writes"] else 0.0
+        return m
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.closing:
+                    self.cond.wait()
+                if not self.queue:
+                    return
+                kind, item = self.queue.pop(0)
+                self.busy = True
+            start = time.perf_counter()
+            size = 0
+            try:
+                size = self._write(kind, item)
+            except Exception as e:
+                print("Save error:", e)
+                self.stats["errors"] += 1
+                self.stats["last_error"] = str(e)
+            ms = (time.perf_counter() - start) * 1000
+            with self.cond:
+                self.busy = False
+                if kind != "sync":
+                    st = self.stats
+                    st["writes"] += 1
+                    st["ops"] += len(item) if kind == "ops" else 0
+                    st["bytes_written"] += size
+                    st["last_write_ms"] = ms
+                    st["max_write_ms"] = max(st["max_write_ms"], ms)
+                    st["total_write_ms"] += ms
+                self.cond.notify_all()
+
+    def _write(self, kind, item):
+        if kind == "ops":
+            size, external = self.store.apply_many(item)
+            if external is None:
+                # ops are by id, so they still apply after reloading
+                self._reload()
+                size, external = self.store.apply_many(item)
+            self.written += len(item)
+        elif kind == "snapshot":
+            taken, payload = item
+            if taken < self.posted:
+                return 0    # stale: the list it was taken from is missing external edits
+            size, external = self.store.write_snapshot(payload)
+        else:
+            size, external = self.store.sync()
+        if external is None:
+            self._reload()
+        elif external:
+            self.stats["external_ops"] += len(external)
+            self._post("ops", external)
+        return size
+
+    def _reload(self):
+        tasks, ids = self.store.load()
+        self.stats["reloads"] += 1
+        self._post("reload", (tasks, ids, self.written))
+
+    def _post(self, kind, item):
+        self.posted += 1
+        self.incoming.put((kind, item))
+
+def open_store(folder, backend="sqlite"):
+    return BACKENDS[backend](folder)
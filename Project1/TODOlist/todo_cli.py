@@ -0,0 +1,108 @@
+"""
+Headless command line for the to-do list (no tkinter, no window).
+
+    python todo_cli.py FOLDER stats
+    python todo_cli.py FOLDER add "buy milk" "call mom"
+    python todo_cli.py FOLDER import tasks.csv
+    python todo_cli.py FOLDER export - --format ndjson
+    python todo_cli.py FOLDER complete "^report"
+    python todo_cli.py FOLDER complete "^report" --undo
+    python todo_cli.py FOLDER delete "old|obsolete" -i
+
+Imports and exports stream one task at a time, and the bulk commands run
+inside the store (one SQL statement, or one pass over tasks.json), so
+memory use does not grow with the size of the list.
+"""
+import argparse
+import os
+import re
+import sys
+
+import storage
+import todo_core
+from storage import Task
+
+def open_input(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, "r", encoding="utf-8", newline="")
+
+def open_output(path):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", newline="")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk operations on a to-do folder.")
+    parser.add_argument("folder", help="folder holding tasks.db / tasks.json")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("stats", help="print Total / Pending / Completed")
+
+    p = sub.add_parser("add", help="add tasks given on the command line")
+    p.add_argument("text", nargs="+")
+
+    for name in ("import", "export"):
+        p = sub.add_parser(name, help=f"{name} tasks ('-' for std{'in' if name == 'import' else 'out'})")
+        p.add_argument("path")
+        p.add_argument("--format", choices=todo_core.FORMATS,
+                       help="default: from the file extension, else ndjson")
+
+    for name, help_text in (("complete", "mark tasks matching a regex as done"),
+                            ("delete", "delete tasks matching a regex")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("pattern")
+        p.add_argument("-i", "--ignore-case", action="store_true")
+        if name == "complete":
+            p.add_argument("--undo", action="store_true", help="mark matching tasks as pending instead")
+
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.folder):
+        parser.error(f"not a folder: {args.folder}")
+    if args.command in ("complete", "delete"):
+        flags = re.IGNORECASE if args.ignore_case else 0
+        try:
+            re.compile(args.pattern, flags)
+        except re.error as e:
+            parser.error(f"bad pattern {args.pattern!r}: {e}")
+    store = storage.open_store(args.folder, args.backend)
+    try:
+        if args.command == "stats":
+            total, done = store.counts()
+            print(f"Total: {total} | Pending: {total - done} | Completed: {done}")
+        elif args.command == "add":
+            n = store.add_many(Task(t.strip()) for t in args.text if t.strip())
+            print(f"Added {n} task(s)")
+        elif args.command == "import":
+            fmt = args.format or todo_core.guess_format(args.path)
+            try:
+                with open_input(args.path) as f:
+                    n = store.add_many(todo_core.read_tasks(f, fmt))
+            except ValueError as e:
+                # add_many writes nothing unless every task was read
+                print(f"Import failed, nothing imported: {args.path}: {e}", file=sys.stderr)
+                return 1
+            print(f"Imported {n} task(s)", file=sys.stderr)
+        elif args.command == "export":
+            fmt = args.format or todo_core.guess_format(args.path)
+            f = open_output(args.path)
+            try:
+                n = todo_core.write_tasks(store.iter_tasks(), f, fmt)
+            finally:
+                if f is not sys.stdout:
+                    f.close()
+            print(f"Exported {n} task(s)", file=sys.stderr)
+        else:
+            if args.command == "complete":
+                n = store.set_done_where(args.pattern, not args.undo, flags)
+                print(f"Marked {n} task(s) as {'pending' if args.undo else 'done'}")
+            else:
+                n = store.delete_where(args.pattern, flags)
+                print(f"Deleted {n} task(s)")
+    finally:
+        store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
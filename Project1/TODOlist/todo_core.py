@@ -0,0 +1,221 @@
+"""
+Core to-do list operations, usable without a display.
+
+    from todo_core import TaskList
+    todo = TaskList.open("/path/to/folder")
+    todo.add("water the plants")
+    todo.close()
+
+Nothing here imports tkinter: todolist.py is the GUI on top of this
+module and todo_cli.py the command line.
+"""
+import csv
+import json
+from array import array
+from bisect import bisect_left
+
+import search
+import storage
+from storage import Task
+
+FORMATS = ("json", "csv", "ndjson")
+
+# ---------------------------
+# In-memory list
+# ---------------------------
+class TaskList:
+    """
+    The list the GUI edits: tasks in id order with a parallel array of ids,
+    plus a running done count and a search index, all updated one operation
+    at a time. Once loaded from a store, every committed operation is queued
+    on a storage.BackgroundWriter, and poll() merges in what other
+    instances sharing the folder have written.
+    """
+
+    def __init__(self, tasks=(), ids=None):
+        self.tasks = list(tasks)
+        self.ids = array("q", range(1, len(self.tasks) + 1)) if ids is None else ids
+        self.done_count = sum(t.done for t in self.tasks)
+        self.index = search.TaskIndex()
+        self.index.rebuild((key, t.text) for key, t in zip(self.ids, self.tasks))
+        self.writer = None
+        self.unwritten = []     # ops committed here, from writer.written onwards
+        self.unwritten_base = 0
+
+    @classmethod
+    def open(cls, folder, backend="sqlite"):
+        todo = cls()
+        todo.load(storage.open_store(folder, backend))
+        return todo
+
+    def load(self, store):
+        self.__init__(*store.load())
+        self.writer = storage.BackgroundWriter(store)
+
+    def position(self, task_id):
+        return storage.find(self.ids, task_id)
+
+    def positions(self, task_ids):
+        """Positions of task_ids, which must be present and in list order."""
+        found, i = [], 0
+        for task_id in task_ids:
+            i = bisect_left(self.ids, task_id, i)
+            found.append(i)
+        return found
+
+    def add(self, text):
+        return self.commit({"op": "add", "id": storage.new_id(self.ids[-1] if self.ids else 0), "text": text})
+
+    def edit(self, i, text):
+        return self.commit({"op": "edit", "id": self.ids[i], "text": text})
+
+    def delete(self, i):
+        return self.commit({"op": "delete", "id": self.ids[i]})
+
+    def toggle(self, i):
+        return self.commit({"op": "toggle", "id": self.ids[i], "done": not self.tasks[i].done})
+
+    def commit(self, op):
+        """Apply op and queue it for the store; returns the position it touched."""
+        i = self.apply(op)
+        if self.writer:
+            self.unwritten.append(op)
+            self.writer.submit(op, self.tasks, self.ids)
+        return i
+
+    def apply(self, op):
+        """Apply op in memory, keeping done_count and the index in step."""
+        kind = op["op"]
+        if kind != "add":
+            i = self.position(op["id"])
+            if i is None:
+                return None
+            was_done = self.tasks[i].done
+        i = storage.apply_op(self.tasks, self.ids, op)
+        if i is None:
+            return None
+        if kind == "add":
+            self.index.add(op["id"], op["text"])
+        elif kind == "delete":
+            self.index.discard(op["id"])
+            self.done_count -= was_done
+        elif kind == "edit":
+            self.index.reindex(op["id"], op["text"])
+        elif kind == "toggle":
+            self.done_count += self.tasks[i].done - was_done
+        return i
+
+    def poll(self):
+        """
+        Merge edits made by other instances. Returns a list of (op, position)
+        for the ops that changed something, or None if the whole list was
+        reloaded.
+        """
+        if not self.writer:
+            return []
+        written = self.writer.written
+        changes = []
+        for kind, item in self.writer.take_changes():
+            if kind == "ops":
+                for op in item:
+                    i = self.apply(op)
+                    if i is not None and changes is not None:
+                        changes.append((op, i))
+            else:
+                tasks, ids, done = item
+                writer, mine = self.writer, self.unwritten[done - self.unwritten_base:]
+                self.__init__(tasks, ids)
+                self.writer = writer
+                self.unwritten, self.unwritten_base = mine, done
+                for op in mine:
+                    self.apply(op)
+                changes = None
+        # ops the store has written can't be lost to a later reload any more
+        del self.unwritten[:max(0, written - self.unwritten_base)]
+        self.unwritten_base = max(self.unwritten_base, written)
+        self.writer.request_sync()
+        return changes
+
+    def stats(self):
+        total = len(self.tasks)
+        return {"total": total, "pending": total - self.done_count, "completed": self.done_count}
+
+    def save(self):
+        if self.writer:
+            self.writer.save(self.tasks, self.ids)
+
+    def close(self):
+        """Flush pending writes and wait for the writer thread."""
+        if self.writer:
+            self.writer.close(self.tasks, self.ids)
+            self.writer = None
+
+# ---------------------------
+# Import / export (streaming)
+# ---------------------------
+TRUE_WORDS = {"1", "true", "yes", "y", "x", "done"}
+
+def guess_format(path, default="ndjson"):
+    for fmt in FORMATS:
+        if path.lower().endswith("." + fmt):
+            return fmt
+    return default
+
+def read_tasks(f, fmt):
+    """
+    Yield tasks from an open text file, one at a time. Malformed input
+    raises ValueError, naming the line for ndjson and csv (not for bytes
+    that aren't UTF-8: the file is decoded ahead of the lines read).
+    """
+    if fmt == "json":
+        for row in storage.iter_json_rows(f):
+            yield _task_from_row(row)
+    elif fmt == "ndjson":
+        n = 0
+        try:
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield _task_from_row(json.loads(line))
+        except UnicodeDecodeError:
+            raise
+        except ValueError as e:
+            raise ValueError(f"line {n}: {e}") from None
+    elif fmt == "csv":
+        reader = csv.DictReader(f)
+        try:
+            for row in reader:
+                done = (row.get("done") or "").strip().lower() in TRUE_WORDS
+                yield Task(row.get("text") or "", done)
+        except csv.Error as e:
+            raise ValueError(f"line {reader.line_num}: {e}") from None
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+
+def _task_from_row(row):
+    if not isinstance(row, dict):
+        raise ValueError(f"expected a task object, got {type(row).__name__}")
+    return storage.task_from_dict(row)
+
+def write_tasks(tasks, f, fmt):
+    """Write tasks to an open text file as they arrive; returns the count."""
+    count = 0
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    if fmt == "json":
+        f.write("[")
+        for t in tasks:
+            f.write(("\n" if count == 0 else ",\n") + dumps(t.to_dict()))
+            count += 1
+        f.write("\n]\n")
+    elif fmt == "ndjson":
+        for t in tasks:
+            f.write(dumps(t.to_dict()) + "\n")
+            count += 1
+    elif fmt == "csv":
+        out = csv.writer(f)
+        out.writerow(["text", "done"])
+        for t in tasks:
+            out.writerow([t.text, int(t.done)])
+            count += 1
+    else:
+        raise ValueError(f"Unknown format: {fmt}")
+    return count
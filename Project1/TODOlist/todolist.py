@@ -1,11 +1,16 @@
 import tkinter as tk
 from tkinter import simpledialog, messagebox, filedialog
-import json
-import os
+
+import storage
+import todo_core
 
 # --- Global variables ---
-tasks = []
-file_path = None
+todo = todo_core.TaskList()   # tasks, done count and search index
+store = None
+STORAGE_BACKEND = "sqlite"   # or "json" for tasks.json + journal
+view = None         # ids of the tasks shown while a search is active, None otherwise
+match_count = 0
+POLL_MS = 1000      # how often to look for edits from other instances
 
 # --- Core functions ---
 def add_task():
@@ -13,37 +18,55 @@ def add_task():
     if not text:
         messagebox.showinfo("Empty Task", "Type a task to add.")
         return
-    tasks.append({"text": text, "done": False})
     entry.delete(0, tk.END)
-    refresh()
-    save_tasks()
+    show_change("add", todo.add(text))
 
 def delete_task():
     idx = get_index()
     if idx is None:
         return
-    if messagebox.askyesno("Delete", f"Delete:\n{tasks[idx]['text']}?"):
-        tasks.pop(idx)
-        refresh()
-        save_tasks()
+    if messagebox.askyesno("Delete", f"Delete:\n{todo.tasks[idx].text}?"):
+        show_change("delete", todo.delete(idx))
 
 def edit_task():
     idx = get_index()
     if idx is None:
         return
-    new_text = simpledialog.askstring("Edit Task", "Modify task:", initialvalue=tasks[idx]["text"])
+    new_text = simpledialog.askstring("Edit Task", "Modify task:", initialvalue=todo.tasks[idx].text)
     if new_text:
-        tasks[idx]["text"] = new_text.strip()
-        refresh()
-        save_tasks()
+        show_change("edit", todo.edit(idx, new_text.strip()))
 
 def toggle_complete():
     idx = get_index()
     if idx is None:
         return
-    tasks[idx]["done"] = not tasks[idx]["done"]
-    refresh()
-    save_tasks()
+    show_change("toggle", todo.toggle(idx))
+
+def show_change(kind, idx):
+    if idx is None:
+        return   # the task was deleted by another instance meanwhile
+    if view is None:
+        update_row(kind, idx, select=True)
+        update_status()
+    else:
+        apply_filter()
+
+def poll_changes():
+    """Merge edits made by other instances sharing the folder."""
+    changes = todo.poll()
+    if changes is None:
+        if view is None:
+            refresh()
+        else:
+            apply_filter()
+    elif changes:
+        if view is None:
+            for op, idx in changes:
+                update_row(op["op"], idx)
+            update_status()
+        else:
+            apply_filter()
+    root.after(POLL_MS, poll_changes)
 
 # --- Helpers ---
 def get_index():
@@ -51,41 +74,73 @@ def get_index():
     if not sel:
         messagebox.showinfo("Select", "Select a task first.")
         return None
+    if view is not None:
+        return todo.position(view[sel[0]])
     return sel[0]
 
+def row_text(t):
+    mark = "☑" if t.done else "☐"
+    return f"{mark} {t.text}"
+
 def refresh():
+    """Rebuild the whole list; only needed after loading."""
     listbox.delete(0, tk.END)
-    for t in tasks:
-        mark = "☑" if t["done"] else "☐"
-        listbox.insert(tk.END, f"{mark} {t['text']}")
-    total = len(tasks)
-    done = sum(t["done"] for t in tasks)
-    pending = total - done
-    status_label.config(text=f"Total: {total} | Pending: {pending} | Completed: {done}")
+    listbox.insert(tk.END, *[row_text(t) for t in todo.tasks])
+    update_status()
+
+def update_row(kind, idx, select=False):
+    """Patch just the listbox row at idx, after a `kind` op touched it."""
+    if kind == "add":
+        listbox.insert(idx, row_text(todo.tasks[idx]))
+        if select:
+            listbox.see(idx)
+    elif kind == "delete":
+        listbox.delete(idx)
+    else:
+        listbox.delete(idx)
+        listbox.insert(idx, row_text(todo.tasks[idx]))
+        if select:
+            listbox.selection_set(idx)
+
+def update_status():
+    stats = todo.stats()
+    text = f"Total: {stats['total']} | Pending: {stats['pending']} | Completed: {stats['completed']}"
+    if view is not None:
+        text += f" | Matches: {match_count}"
+    status_label.config(text=text)
+
+def apply_filter():
+    """Show only the tasks matching the search box (filter-as-you-type)."""
+    global view, match_count
+    query = search_entry.get()
+    if not query.strip():
+        if view is not None:
+            view = None
+            refresh()
+        return
+    match_count, view = todo.index.search(query)
+    listbox.delete(0, tk.END)
+    listbox.insert(tk.END, *[row_text(todo.tasks[i]) for i in todo.positions(view)])
+    update_status()
 
 # --- File handling ---
 def choose_folder():
-    global file_path
-    folder = filedialog.askdirectory(title="Select folder to store tasks.json")
+    global store
+    folder = filedialog.askdirectory(title="Select folder to store your tasks")
     if not folder:
         messagebox.showwarning("Folder required", "You must select a folder.")
         root.destroy()
-    file_path = os.path.join(folder, "tasks.json")
+    store = storage.open_store(folder, STORAGE_BACKEND)
 
 def save_tasks():
-    if file_path:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+    todo.save()
 
 def load_tasks():
-    if file_path and os.path.exists(file_path):
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            global tasks
-            tasks = [{"text": t.get("text",""), "done": t.get("done", False)} for t in data]
+    if store:
+        todo.load(store)
 
 def on_close():
-    save_tasks()
+    todo.close()   # flushes pending writes and waits for the writer thread
     root.destroy()
 
 # --- GUI setup ---
@@ -104,6 +159,13 @@ tk.Button(btn_frame, text="Edit", width=10, command=edit_task).pack(side="left",
 tk.Button(btn_frame, text="Delete", width=10, command=delete_task).pack(side="left", padx=5)
 tk.Button(btn_frame, text="Check/Uncheck", width=12, command=toggle_complete).pack(side="left", padx=5)
 
+search_frame = tk.Frame(root)
+search_frame.pack(fill="x", padx=10)
+tk.Label(search_frame, text="Search:").pack(side="left")
+search_entry = tk.Entry(search_frame, font=("Segoe UI", 11))
+search_entry.pack(side="left", fill="x", expand=True, padx=5)
+search_entry.bind("<KeyRelease>", lambda e: apply_filter())
+
 listbox = tk.Listbox(root, font=("Segoe UI", 12), selectmode=tk.SINGLE)
 listbox.pack(fill="both", expand=True, padx=10, pady=5)
 listbox.bind("<Double-Button-1>", lambda e: toggle_complete())
@@ -115,5 +177,6 @@ status_label.pack(fill="x", padx=10, pady=5)
 choose_folder()
 load_tasks()
 refresh()
+root.after(POLL_MS, poll_changes)
 root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
@@ -0,0 +1,122 @@
+"""
+Throughput benchmark: calc_engine vs the old regex check + eval() path.
+
+    python bench_calc.py               # 200,000 expressions
+    python bench_calc.py -n 50000 --distinct 5000
+    python bench_calc.py --check       # assert edge cases of the engine, then exit
+
+The corpus is random arithmetic of the kind the keypad and
+text_to_expression produce; --distinct controls how often expressions
+repeat (repeats are what the compiled-expression cache is for).
+
+--check asserts results the eval() comparison can't cover: ranges
+(their length, empty and descending ones), long operator chains and
+oversized results; the exit status is 1 if any of these fails.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+import calc_engine
+
+ALLOWED_CHARS_RE = re.compile(r'^[0-9\s\.\+\-\*\/\(\)\%]+$')
+
+def old_safe_eval(expr):
+    # safe_eval before calc_engine (with % allowed so both sides see the same corpus)
+    expr = expr.strip()
+    if not expr:
+        raise ValueError("Empty expression")
+    if not ALLOWED_CHARS_RE.match(expr):
+        raise ValueError("Disallowed characters in expression.")
+    return eval(expr, {"__builtins__": None}, {})
+
+def random_expr(rng, depth=0):
+    if depth > 2 or rng.random() < 0.3:
+        if rng.random() < 0.2:
+            return f"{rng.randint(0, 999)}.{rng.randint(0, 99)}"
+        return str(rng.randint(1, 9999))
+    op = rng.choice("+-*/%")
+    left, right = random_expr(rng, depth + 1), random_expr(rng, depth + 1)
+    expr = f"{left}{op}{right}"
+    r = rng.random()
+    if r < 0.2:
+        expr = f"({expr})"
+    elif r < 0.3:
+        expr = f"-{expr}"
+    return expr
+
+def make_corpus(n, distinct, seed=1):
+    rng = random.Random(seed)
+    pool = [random_expr(rng) for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(n)]
+
+def run(label, fn, corpus):
+    start = time.perf_counter()
+    results = []
+    for expr in corpus:
+        try:
+            results.append(fn(expr))
+        except ZeroDivisionError:
+            results.append(None)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(corpus) / elapsed:12,.0f} expr/s   {elapsed:7.3f} s")
+    return results
+
+def check():
+    """Run the engine checks; returns True if all of them pass."""
+    failures = 0
+    def expect(label, expr, want):
+        nonlocal failures
+        try:
+            got = calc_engine.evaluate(expr)
+            got = got.count if isinstance(got, calc_engine.RangeResult) else got
+        except Exception as e:
+            got = type(e)
+        ok = got == want
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {label}: {expr[:40]!r} gave {got!r}")
+
+    expect("a range includes its stop", "x for x in 1..10", 10)
+    expect("a fractional step reaches the stop", "x for x in 0..1 step 0.1", 11)
+    expect("a range of one value", "x for x in 5..5", 1)
+    expect("a descending range is empty", "x for x in 5..4", ValueError)
+    expect("a descending fractional range is empty", "x for x in 5..4.5", ValueError)
+    expect("a grid multiplies the ranges", "x*y for x in 1..3, y in 1..4", 12)
+    expect("a long flat sum", "1+" * 2000 + "1", 2001)
+    expect("a long chain with variables", "x-" * 2000 + "x for x in 1..3", 3)
+    expect("a result over MAX_BITS is refused", "10**4300", OverflowError)
+
+    print(f"engine checks: {failures} failure(s)")
+    return failures == 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=200000, help="expressions to evaluate")
+    parser.add_argument("--distinct", type=int, default=2000, help="distinct expressions in the corpus")
+    parser.add_argument("--check", action="store_true", help="assert engine edge cases instead of benchmarking")
+    args = parser.parse_args()
+    if args.check:
+        return 0 if check() else 1
+    corpus = make_corpus(args.n, args.distinct)
+    unique = list(dict.fromkeys(corpus))
+    print(f"{len(corpus):,} expressions, {len(unique):,} distinct, cache size {calc_engine.CACHE_SIZE}")
+
+    expected = run("eval (old)", old_safe_eval, corpus)
+    calc_engine.compile_expr.cache_clear()
+    got = run("calc_engine", calc_engine.evaluate, corpus)
+    print("   ", calc_engine.cache_info())
+    run("calc_engine, all cached", calc_engine.evaluate, unique[:calc_engine.CACHE_SIZE] * (args.n // min(len(unique), calc_engine.CACHE_SIZE)))
+
+    def uncached(expr):
+        fn, _ = calc_engine.compile_tree(calc_engine.parse(expr))
+        return fn(None)
+    run("calc_engine, no cache", uncached, unique)
+    run("eval (old), same", old_safe_eval, unique)
+
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    print(f"results differing from eval: {mismatches}")
+
+if __name__ == "__main__":
+    sys.exit(main())
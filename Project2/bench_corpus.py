@@ -0,0 +1,220 @@
+"""
+Offline end-to-end benchmark over a corpus of recorded clips.
+
+    python bench_corpus.py --make 200 corpus/             # synthetic corpus (see below)
+    python bench_corpus.py corpus/ --backend transcript   # no sphinx/network needed
+    python bench_corpus.py recordings/ --jobs 4 -o results.ndjson --min-accuracy 0.9
+
+A corpus is a directory with WAV (or AIFF/FLAC) clips and a manifest.csv
+with the columns file, expected (the expression the clip should give)
+and optionally transcript (what was said). Every clip is read through
+sr.AudioFile and goes through recognize_audio, the same race as
+recognize_speech_from_mic, then text_to_expression and calc_engine, in
+a pool of --jobs processes.
+
+Backends: "default" races sphinx and Google like the app; "sphinx" and
+"google" use one of them; "transcript" stands in for recognition with the
+manifest's transcript after --delay seconds, which measures everything
+except the recognizer itself.
+
+--make N writes N clips with random spoken expressions (bench_spoken's
+generator). With --tts (needs pyttsx3) the clips are synthesized speech;
+otherwise they are tone bursts that only the transcript backend can use.
+
+Reported: recognition latency p50/p95, expression accuracy (exact match),
+result accuracy (same value as the expected expression), evaluation
+errors, and clips per second. --min-accuracy makes the run fail (exit 1)
+below the given expression accuracy, for use before a release.
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+import speech_recognition as sr
+
+import calc_engine
+from bench_spoken import random_case
+from speech_input import GoogleBackend, SphinxBackend, StandInBackend
+from spoken_math import text_to_expression
+from voice_calculator import recognize_audio
+
+BACKENDS = ("default", "sphinx", "google", "transcript")
+RATE = 16000
+
+# ---------------------------
+# Corpus
+# ---------------------------
+def load_manifest(directory):
+    with open(os.path.join(directory, "manifest.csv"), newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def tone_clip(path, words, rng):
+    """A stand-in clip: one short tone burst per word."""
+    frames = bytearray()
+    for _ in range(words):
+        pitch = rng.uniform(200, 400)
+        frames += b"".join(struct.pack("<h", int(6000 * math.sin(2 * math.pi * pitch * i / RATE)))
+                           for i in range(RATE // 5))
+        frames += bytes(2 * RATE // 20)
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes(bytes(frames))
+
+def make_corpus(directory, n, seed=0, tts=False):
+    """Write n random clips and their manifest.csv into directory."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    engine = None
+    if tts:
+        import pyttsx3
+        engine = pyttsx3.init()
+    rows = []
+    for i in range(n):
+        transcript, expected = random_case(rng)
+        name = f"clip{i:05d}.wav"
+        path = os.path.join(directory, name)
+        if engine:
+            engine.save_to_file(transcript, path)
+        else:
+            tone_clip(path, len(transcript.split()), rng)
+        rows.append({"file": name, "expected": expected, "transcript": transcript})
+    if engine:
+        engine.runAndWait()
+    with open(os.path.join(directory, "manifest.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["file", "expected", "transcript"])
+        writer.writeheader()
+        writer.writerows(rows)
+    return rows
+
+# ---------------------------
+# Per clip (runs in the workers)
+# ---------------------------
+def backends_for(name, recognizer, row, delay):
+    if name == "sphinx":
+        return [SphinxBackend(recognizer)]
+    if name == "google":
+        return [GoogleBackend(recognizer)]
+    if name == "transcript":
+        return [StandInBackend(row.get("transcript") or None, delay, name="transcript")]
+    return None     # recognize_audio's default: sphinx and Google raced
+
+def run_clip(args):
+    directory, row, backend, delay = args
+    record = {"file": row["file"], "expected": row["expected"]}
+    recognizer = sr.Recognizer()
+    start = time.perf_counter()
+    try:
+        with sr.AudioFile(os.path.join(directory, row["file"])) as source:
+            audio = recognizer.record(source)
+    except Exception as e:
+        record["error"] = f"audio: {e}"
+        return record
+    loaded = time.perf_counter()
+    res = recognize_audio(recognizer, audio, backends_for(backend, recognizer, row, delay))
+    recognized = time.perf_counter()
+    record.update(load_ms=(loaded - start) * 1000, recognize_ms=(recognized - loaded) * 1000,
+                  transcription=res["transcription"], backend=res.get("backend"))
+    if not res["success"]:
+        record["error"] = res["error"]
+        return record
+    expr = text_to_expression(res["transcription"])
+    record["expression"] = expr
+    record["expression_ok"] = expr == row["expected"]
+    try:
+        result = calc_engine.evaluate(expr)
+        record["result"] = result if isinstance(result, (int, float)) else str(result)
+        record["result_ok"] = result == calc_engine.evaluate(row["expected"])
+    except Exception as e:
+        record["eval_error"] = f"{type(e).__name__}: {e}"
+        record["result_ok"] = False
+    record["total_ms"] = (time.perf_counter() - start) * 1000
+    return record
+
+# ---------------------------
+# Report
+# ---------------------------
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))] if values else 0.0
+
+def summarize(records, elapsed):
+    n = len(records)
+    latencies = [r["recognize_ms"] for r in records if "recognize_ms" in r]
+    totals = [r["total_ms"] for r in records if "total_ms" in r]
+    return {
+        "clips": n,
+        "recognized": sum("transcription" in r and "error" not in r for r in records),
+        "failed": sum("error" in r for r in records),
+        "expression_accuracy": sum(bool(r.get("expression_ok")) for r in records) / n if n else 0.0,
+        "result_accuracy": sum(bool(r.get("result_ok")) for r in records) / n if n else 0.0,
+        "eval_errors": sum("eval_error" in r for r in records),
+        "recognize_p50_ms": percentile(latencies, 50),
+        "recognize_p95_ms": percentile(latencies, 95),
+        "total_p50_ms": percentile(totals, 50),
+        "total_p95_ms": percentile(totals, 95),
+        "seconds": elapsed,
+        "clips_per_second": n / elapsed if elapsed else 0.0,
+    }
+
+def run(directory, backend="default", jobs=None, delay=0.0, out=None):
+    rows = load_manifest(directory)
+    tasks = [(directory, row, backend, delay) for row in rows]
+    start = time.perf_counter()
+    records = []
+    if jobs == 1:
+        results = map(run_clip, tasks)
+    else:
+        pool = ProcessPoolExecutor(jobs or os.cpu_count() or 1)
+        results = pool.map(run_clip, tasks, chunksize=max(1, len(tasks) // (4 * (jobs or os.cpu_count() or 1))))
+    try:
+        for record in results:
+            records.append(record)
+            if out:
+                out.write(json.dumps(record) + "\n")
+    finally:
+        if jobs != 1:
+            pool.shutdown()
+    return records, summarize(records, time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", help="directory with manifest.csv and the clips")
+    parser.add_argument("--make", type=int, metavar="N", help="write N synthetic clips into corpus and exit")
+    parser.add_argument("--tts", action="store_true", help="with --make: synthesize speech with pyttsx3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=BACKENDS, default="default")
+    parser.add_argument("--delay", type=float, default=0.0, help="transcript backend: seconds per clip")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count; 1 = no pool)")
+    parser.add_argument("-o", "--output", help="per-clip NDJSON results")
+    parser.add_argument("--min-accuracy", type=float, help="exit 1 if expression accuracy is lower")
+    args = parser.parse_args()
+
+    if args.make:
+        make_corpus(args.corpus, args.make, args.seed, args.tts)
+        print(f"wrote {args.make} clips to {args.corpus}")
+        return 0
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        records, summary = run(args.corpus, args.backend, args.jobs, args.delay, out)
+    finally:
+        if out:
+            out.close()
+    for key, value in summary.items():
+        print(f"{key:<22}{value:>12.3f}" if isinstance(value, float) else f"{key:<22}{value:>12}")
+    if args.min_accuracy is not None and summary["expression_accuracy"] < args.min_accuracy:
+        print(f"expression accuracy below {args.min_accuracy}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Recognizer racing vs the old one-after-the-other chain, offline.
+
+    python bench_recognizers.py
+    python bench_recognizers.py --scale 0.1     # same scenarios, 10x faster
+    python bench_recognizers.py --check         # assert how race() behaves, then exit
+
+Uses speech_input.StandInBackend with fixed delays in place of sphinx
+and Google, so no microphone, audio or network is needed. For each
+scenario it prints the transcription and latency of the sequential chain
+(each backend in turn until one gives text that parses) and of race().
+
+--check asserts that the first acceptable answer wins, that a backend
+error falls back to the others, that timeouts are honoured, and that
+backends hanging past their timeout don't hold up later races; the exit
+status is 1 if any of these fails.
+"""
+import argparse
+import sys
+import threading
+import time
+
+import speech_recognition as sr
+
+import metrics
+from speech_input import MAX_STUCK, StandInBackend, race
+from spoken_math import text_to_expression
+
+def scenarios(scale):
+    def b(name, delay, text=None, error=None, timeout=3.0):
+        return StandInBackend(text, delay * scale, error, name, timeout * scale)
+    return {
+        "sphinx mishears, google right": [b("sphinx", 0.3, "hello there"), b("google", 0.6, "five plus seven")],
+        "sphinx slow and fails": [b("sphinx", 1.5), b("google", 0.5, "ten over four")],
+        "google hangs (timeout 2 s)": [b("google", 10, "two times two", timeout=2), b("sphinx", 0.8, "two times two")],
+        "google offline": [b("google", 0.1, error=sr.RequestError("offline")), b("sphinx", 0.7, "nine minus one")],
+        "nobody understands": [b("sphinx", 0.4), b("google", 0.6)],
+    }
+
+def sequential(backends, accept):
+    """The old chain: next backend only after the previous one failed (or timed out)."""
+    fallback = None
+    for backend in backends:
+        cancel = threading.Event()
+        result = []
+        def run():
+            try:
+                result.append(backend.recognize(None, cancel))
+            except Exception:
+                pass
+        t = threading.Thread(target=run, daemon=True)
+        t.start()
+        t.join(backend.timeout)
+        cancel.set()
+        if result and accept(result[0]):
+            return result[0]
+        if result and fallback is None:
+            fallback = result[0]
+    return fallback
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def check(scale):
+    """Run the race() checks; returns True if all of them pass."""
+    def b(name, delay, text=None, error=None, timeout=3.0, hang=False):
+        return StandInBackend(text, delay * scale, error, name, timeout * scale, hang)
+    def run(backends):
+        return timed(lambda: race(None, backends, accept=text_to_expression))
+    slack = 0.3 * scale * 1000     # ms allowed for thread start-up and scheduling
+    failures = 0
+    def expect(label, ok, res, ms):
+        nonlocal failures
+        failures += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {label}: {res['transcription']!r} from {res['backend'] or res['error']}, "
+              f"{ms:.0f} ms")
+
+    res, ms = run([b("sphinx", 0.1, "hello there"), b("google", 0.3, "five plus seven"),
+                   b("slow", 2.0, "one plus one")])
+    expect("first acceptable answer wins, unparsable one skipped",
+           res["backend"] == "google" and res["transcription"] == "five plus seven" and ms < 300 * scale + slack,
+           res, ms)
+    res, ms = run([b("google", 0.4, "three plus three"), b("sphinx", 0.1, "two plus two")])
+    expect("the faster of two acceptable answers wins", res["backend"] == "sphinx" and ms < 400 * scale, res, ms)
+
+    res, ms = run([b("google", 0.05, error=sr.RequestError("offline")), b("sphinx", 0.2, "nine minus one")])
+    expect("a backend error falls back to the other", res["backend"] == "sphinx" and res["success"], res, ms)
+    res, ms = run([b("google", 0.05, error=sr.RequestError("offline")), b("sphinx", 0.1)])
+    expect("all failing reports the service error", not res["success"] and "unavailable" in res["error"], res, ms)
+
+    res, ms = run([b("google", 5.0, "two times two", timeout=0.3), b("sphinx", 0.1)])
+    expect("a timeout is honoured",
+           not res["success"] and 300 * scale <= ms < 300 * scale + slack, res, ms)
+    res, ms = run([b("google", 5.0, "two times two", timeout=0.3, hang=True), b("sphinx", 0.1, "two times two")])
+    expect("a backend ignoring cancel doesn't delay the winner", res["backend"] == "sphinx" and ms < 100 * scale + slack,
+           res, ms)
+
+    # hung calls keep their threads; later races must not wait for them
+    worst = 0.0
+    for _ in range(3 * MAX_STUCK):
+        res, ms = run([b("hung", 5.0, "one plus one", timeout=0.1, hang=True), b("fast", 0.02, "one plus one")])
+        worst = max(worst, ms)
+        if res["backend"] != "fast":
+            break
+    skipped = metrics.STATS.counters.get("recognize.hung.skipped", 0)
+    expect(f"{3 * MAX_STUCK} races next to a hung backend (worst shown, {skipped} skips)",
+           res["backend"] == "fast" and worst < 20 * scale + slack and skipped > 0, res, worst)
+
+    print(f"race checks: {failures} failure(s)")
+    return failures == 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every delay and timeout")
+    parser.add_argument("--check", action="store_true", help="assert race() behaviour instead of benchmarking")
+    args = parser.parse_args()
+    if args.check:
+        return 0 if check(args.scale) else 1
+    for name, backends in scenarios(args.scale).items():
+        seq, seq_ms = timed(lambda: sequential(backends, text_to_expression))
+        res, race_ms = timed(lambda: race(None, backends, accept=text_to_expression))
+        print(f"{name}:")
+        print(f"    sequential {seq_ms:7.0f} ms   {seq!r}")
+        print(f"    race       {race_ms:7.0f} ms   {res['transcription']!r} ({res['backend'] or res['error']})")
+
+if __name__ == "__main__":
+    sys.exit(main())
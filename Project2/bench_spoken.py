@@ -0,0 +1,129 @@
+"""
+Property check and throughput benchmark for spoken_math.text_to_expression.
+
+    python bench_spoken.py                 # check 20,000 cases, then time 200,000 transcripts
+    python bench_spoken.py --check 100000 -n 0
+
+The check renders random numbers and expressions as words (the way a
+recognizer transcribes them, with filler words mixed in) and asserts that
+text_to_expression gives back the expression. The benchmark reports
+transcripts and words per second, and the time per word for transcripts
+of growing length, which stays flat if parsing is linear.
+"""
+import argparse
+import random
+import sys
+import time
+
+from spoken_math import NUM_WORDS, OP_MAP, TENS, text_to_expression
+
+UNITS = {v: k for k, v in NUM_WORDS.items()}
+TENS_WORDS = {v: k for k, v in TENS.items()}
+SCALES = [(10**9, "billion"), (10**6, "million"), (10**3, "thousand")]
+SPOKEN_OPS = {"+": ["plus", "add"], "-": ["minus", "less"], "*": ["times", "multiplied by", "x"],
+              "/": ["divided by", "over"], "%": ["mod", "modulo"]}
+FILLERS = ["what is", "calculate", "please", "ok", "um", "hey"]
+
+def below_thousand(n, rng):
+    words = []
+    if n >= 100:
+        words += [UNITS[n // 100], "hundred"]
+        n %= 100
+        if n and rng.random() < 0.3:
+            words.append("and")
+    if n >= 20:
+        words.append(TENS_WORDS[n - n % 10])
+        n %= 10
+        if n:
+            words.append(UNITS[n])
+    elif n or not words:
+        words.append(UNITS[n])
+    return words
+
+def number_words(n, rng):
+    """English words for a non-negative int below a trillion."""
+    if n == 0:
+        return ["zero"]
+    words = []
+    for value, name in SCALES:
+        if n >= value:
+            words += below_thousand(n // value, rng) + [name]
+            n %= value
+    if n:
+        words += below_thousand(n, rng)
+    return words
+
+def random_number(rng):
+    """(words, expression text) for a random number, sometimes decimal or negative."""
+    n = rng.choice([rng.randint(0, 99), rng.randint(100, 999), rng.randint(0, 10**6), rng.randint(0, 10**12 - 1)])
+    if rng.random() < 0.2:
+        n = rng.choice([100, 1000, 10**6, 10**9])
+    words, text = number_words(n, rng), str(n)
+    if rng.random() < 0.2:
+        digits = [rng.randint(0, 9) for _ in range(rng.randint(1, 3))]
+        words += ["point"] + [UNITS[d] for d in digits]
+        text += "." + "".join(map(str, digits))
+    if rng.random() < 0.05:
+        words, text = ["negative"] + words, "-" + text
+    return words, text
+
+def random_case(rng):
+    """(transcript, expected expression) with 1-4 numbers."""
+    words, expected = random_number(rng)
+    for _ in range(rng.randint(0, 3)):
+        op = rng.choice(list(SPOKEN_OPS))
+        more, text = random_number(rng)
+        words += rng.choice(SPOKEN_OPS[op]).split() + more
+        expected += op + text
+    if rng.random() < 0.5:
+        words = rng.choice(FILLERS).split() + words
+    return " ".join(words), expected
+
+def check(count, seed):
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(count):
+        transcript, expected = random_case(rng)
+        got = text_to_expression(transcript)
+        if got != expected:
+            failures += 1
+            if failures <= 10:
+                print(f"  {transcript!r}: expected {expected!r}, got {got!r}")
+    print(f"property check: {count:,} cases, {failures} failures")
+    return failures == 0
+
+def bench(n, seed):
+    rng = random.Random(seed)
+    corpus = [random_case(rng)[0] for _ in range(n)]
+    words = sum(len(t.split()) for t in corpus)
+    start = time.perf_counter()
+    for t in corpus:
+        text_to_expression(t)
+    elapsed = time.perf_counter() - start
+    print(f"{n:,} transcripts, {words:,} words: {n / elapsed:,.0f} transcripts/s, "
+          f"{words / elapsed:,.0f} words/s")
+
+    print("scaling (one transcript of growing length):")
+    vocab = list(OP_MAP) + list(NUM_WORDS) + list(TENS) + ["hundred", "thousand", "point", "and", "please"]
+    for length in (10, 100, 1000, 10000, 100000):
+        text = " ".join(rng.choice(vocab) for _ in range(length))
+        runs = max(1, 100000 // length)
+        start = time.perf_counter()
+        for _ in range(runs):
+            text_to_expression(text)
+        per_word = (time.perf_counter() - start) / runs / length
+        print(f"  {length:>7,} words   {per_word * 1e6:6.2f} us/word")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", type=int, default=200000, help="transcripts to time (0 to skip)")
+    parser.add_argument("--check", type=int, default=20000, help="random cases to check (0 to skip)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    ok = check(args.check, args.seed) if args.check else True
+    if args.n:
+        bench(args.n, args.seed)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
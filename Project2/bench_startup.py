@@ -0,0 +1,105 @@
+"""
+Voice calculator startup time: imports and time to first window.
+
+    python bench_startup.py
+    python bench_startup.py --runs 10
+
+Each measurement runs in a fresh interpreter and the median of --runs is
+reported: importing voice_calculator, importing the speech packages it
+now defers (speech_recognition, pyttsx3; skipped when not installed), and,
+when a display is available, the time from interpreter start to the
+window being mapped and to voice input being ready (set up in the
+background after the window appears).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__(sys.argv[1])
+except ImportError as e:
+    print(json.dumps({"error": str(e)}))
+else:
+    print(json.dumps({"ms": (time.perf_counter() - start) * 1000}))
+"""
+
+WINDOW = """
+import json, os, time
+start = time.perf_counter()
+import tkinter as tk
+import voice_calculator
+out = {}
+try:
+    root = tk.Tk()
+except tk.TclError as e:
+    print(json.dumps({"error": str(e)}))
+    raise SystemExit
+app = voice_calculator.VoiceCalculatorApp(root)
+
+def mapped(event):
+    if event.widget is root and "window_ms" not in out:
+        out["window_ms"] = (time.perf_counter() - start) * 1000
+
+def check():
+    if app.speech_ready:
+        out["speech_ready_ms"] = (time.perf_counter() - start) * 1000
+        print(json.dumps(out), flush=True)
+        os._exit(0)     # skip joining the speech threads
+    root.after(5, check)
+
+root.bind("<Map>", mapped)
+root.after(5, check)
+root.after(30000, lambda: (print(json.dumps(out), flush=True), os._exit(0)))
+root.mainloop()
+"""
+
+def run(code, *args):
+    proc = subprocess.run([sys.executable, "-c", code, *args], cwd=HERE,
+                          capture_output=True, text=True, timeout=60)
+    lines = proc.stdout.strip().splitlines()
+    if not lines:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"}
+    return json.loads(lines[-1])
+
+def median_of(runs, code, *args):
+    """{key: median} over runs, or {"error": ...} if the first run fails."""
+    samples = []
+    for _ in range(runs):
+        result = run(code, *args)
+        if "error" in result:
+            return result
+        samples.append(result)
+    return {key: statistics.median(s[key] for s in samples if key in s) for key in samples[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    for module in ("voice_calculator", "speech_recognition", "pyttsx3"):
+        result = median_of(args.runs, IMPORT, module)
+        if "error" in result:
+            print(f"import {module:<20} skipped ({result['error']})")
+        else:
+            note = "" if module == "voice_calculator" else "  (deferred, no longer paid at startup)"
+            print(f"import {module:<20} {result['ms']:8.1f} ms{note}")
+
+    result = median_of(args.runs, WINDOW)
+    if "error" in result:
+        print(f"first window                skipped ({result['error']})")
+        return
+    if "window_ms" in result:
+        print(f"first window                {result['window_ms']:8.1f} ms")
+    if "speech_ready_ms" in result:
+        print(f"voice input ready           {result['speech_ready_ms']:8.1f} ms  (in the background)")
+
+if __name__ == "__main__":
+    main()
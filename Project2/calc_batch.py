@@ -0,0 +1,131 @@
+"""
+Headless batch evaluation: one transcript or expression per input line,
+one NDJSON result per line out, in input order.
+
+    python calc_batch.py transcripts.txt -o results.ndjson
+    python calc_batch.py - --mode expr < expressions.txt
+    python calc_batch.py big.log --jobs 8 --chunk-size 5000
+
+Each output line looks like
+    {"line": 3, "input": "five plus seven", "expression": "5+7", "result": 12}
+or carries an "error" instead of a result. Lines are read and written as
+a stream and handed to a process pool in chunks; at most --max-pending
+chunks are in flight, so memory stays bounded on inputs of any size.
+Throughput (lines per second) is reported on stderr.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import calc_engine
+from spoken_math import text_to_expression
+
+LETTERS_RE = re.compile(r"[A-Za-z]")
+# typed ranges ("x*2 for x in 1..10") have letters but are not transcripts
+RANGES_RE = re.compile(r"\sfor\s+[A-Za-z_]\w*\s+in\s.*\.\.")
+
+def evaluate_line(number, text, mode="auto"):
+    """Result record (a dict) for one input line."""
+    record = {"line": number, "input": text}
+    try:
+        if mode == "text" or (mode == "auto" and LETTERS_RE.search(text) and not RANGES_RE.search(text)):
+            expr = text_to_expression(text)
+            record["expression"] = expr
+            if not expr:
+                raise ValueError("Couldn't parse the spoken math expression.")
+        else:
+            expr = text
+        result = calc_engine.evaluate(expr)
+        record["result"] = result if isinstance(result, (int, float)) else str(result)
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    return record
+
+def evaluate_chunk(start, lines, mode):
+    """NDJSON text for a chunk of lines numbered from start (runs in the workers)."""
+    # allow_nan=False: inf and nan are not JSON, so they fail like an oversized int
+    dumps = json.JSONEncoder(ensure_ascii=False, allow_nan=False).encode
+    out = []
+    for number, text in enumerate(lines, start):
+        text = text.rstrip("\r\n")
+        if text.strip():
+            record = evaluate_line(number, text, mode)
+            try:
+                line = dumps(record)
+            except ValueError as e:
+                # an int too long for str() or a float that is inf or nan;
+                # only this line fails
+                record.pop("result", None)
+                record["error"] = f"{type(e).__name__}: {e}"
+                line = dumps(record)
+            out.append(line + "\n")
+    return "".join(out)
+
+def chunks(f, size):
+    """(first line number, [lines]) groups of up to size lines."""
+    lines = []
+    start = 1
+    for number, line in enumerate(f, 1):
+        lines.append(line)
+        if len(lines) == size:
+            yield start, lines
+            lines = []
+            start = number + 1
+    if lines:
+        yield start, lines
+
+def run(f, out, mode="auto", jobs=None, chunk_size=2000, max_pending=None):
+    """Evaluate every line of f, writing NDJSON to out. Returns the number of lines read."""
+    count = 0
+    if jobs == 1:
+        for start, lines in chunks(f, chunk_size):
+            out.write(evaluate_chunk(start, lines, mode))
+            count += len(lines)
+        return count
+    jobs = jobs or os.cpu_count() or 1
+    max_pending = max_pending or 2 * jobs
+    pending = deque()
+    with ProcessPoolExecutor(jobs) as pool:
+        for start, lines in chunks(f, chunk_size):
+            if len(pending) >= max_pending:
+                out.write(pending.popleft().result())
+            pending.append(pool.submit(evaluate_chunk, start, lines, mode))
+            count += len(lines)
+        while pending:
+            out.write(pending.popleft().result())
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="file with one transcript or expression per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--mode", choices=("auto", "text", "expr"), default="auto",
+                        help="text: spoken transcripts, expr: typed expressions, "
+                             "auto: transcripts if the line has letters and no typed ranges")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: CPU count; 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=2000, help="lines per task")
+    parser.add_argument("--max-pending", type=int, help="chunks in flight (default: 2 x jobs)")
+    args = parser.parse_args(argv)
+
+    f = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", errors="replace")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        count = run(f, out, args.mode, args.jobs, args.chunk_size, args.max_pending)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{count:,} lines in {elapsed:.2f} s ({count / elapsed if elapsed else 0:,.0f} lines/s)",
+          file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""
+Arithmetic engine for the voice calculator: tokenizer, Pratt parser and a
+compiler that turns the parse tree into nested closures.
+
+    from calc_engine import evaluate
+    evaluate("12/3.5")        # 3.4285714285714284
+    evaluate("-(2+3)*4 % 7")  # 1
+    evaluate("x*2+1", {"x": 20})                # 41
+    evaluate("x*2+1 for x in 1..1000000")      # RangeResult: sum, min, max, samples
+
+Supports + - * / // % ** and parentheses, unary minus/plus, named
+variables and the usual precedence (** binds tighter than unary minus and
+is right-associative, as in Python). Numbers and results follow Python
+semantics: ints stay ints, "/" is true division. Compiled expressions are
+kept in an LRU cache, so repeated expressions skip tokenizing and parsing.
+
+Variables take their values from the env mapping, or from ranges:
+"EXPR for x in START..STOP [step STEP], y in ..." (STOP inclusive,
+several ranges form a grid). A ranged expression is compiled once and
+evaluated over NumPy arrays (imported on first use) in float64, and
+the result is summarized as a RangeResult instead of listing every value.
+
+Evaluation is bounded: expressions are limited in length and nesting,
+and the cost of every multiplication and power is checked before it is
+computed, so "9**9**9" fails at once with OverflowError instead of
+running for hours. EvalWorker adds a hard time and memory budget on top
+by evaluating in a separate process.
+"""
+import math
+import multiprocessing
+import operator
+import os
+import re
+import threading
+from functools import lru_cache
+
+CACHE_SIZE = 1024
+MAX_LENGTH = 10000      # characters
+MAX_DEPTH = 200         # nested parentheses / unary operators
+MAX_BITS = 14000        # about 4,200 decimal digits, under Python's int -> str limit of 4,300
+
+# ---------------------------
+# Tokenizer
+# ---------------------------
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>\d+\.?\d*|\.\d+)
+      | (?P<op>\*\*|//|[-+*/%()])
+      | (?P<name>[A-Za-z_]\w*)
+    )""", re.VERBOSE)
+
+class Name(str):
+    """A variable name token (operators are plain str)."""
+
+def tokenize(expr):
+    """Split expr into a list of tokens: numbers as int/float, operators as str, variables as Name."""
+    tokens = []
+    pos = 0
+    end = len(expr.rstrip())
+    match = TOKEN_RE.match
+    while pos < end:
+        m = match(expr, pos)
+        if not m:
+            raise ValueError("Disallowed characters in expression.")
+        num = m.group("num")
+        if m.group("name"):
+            tokens.append(Name(m.group("name")))
+        elif num is None:
+            tokens.append(m.group("op"))
+        elif "." in num:
+            tokens.append(float(num))
+        else:
+            tokens.append(int(num))
+        pos = m.end()
+    return tokens
+
+# ---------------------------
+# Pratt parser
+# ---------------------------
+# Parse trees are tuples: ("num", value), ("var", name), ("neg", node),
+# ("pos", node), or (op, left, right) for the binary operators.
+
+# binding power of each binary operator; ** is right-associative
+BINARY = {"+": 10, "-": 10, "*": 20, "/": 20, "//": 20, "%": 20, "**": 40}
+RIGHT_ASSOC = {"**"}
+UNARY_POWER = 30    # -2**2 == -(2**2), 2**-1 == 0.5
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+
+    def next(self):
+        tok = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        self.pos += 1
+        return tok
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def expression(self, min_power=0):
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ValueError("Expression is nested too deeply")
+        left = self.prefix(self.next())
+        while True:
+            op = self.peek()
+            power = BINARY.get(op) if isinstance(op, str) and not isinstance(op, Name) else None
+            if power is None or power <= min_power:
+                self.depth -= 1
+                return left
+            self.pos += 1
+            right = self.expression(power - 1 if op in RIGHT_ASSOC else power)
+            left = (op, left, right)
+
+    def prefix(self, tok):
+        if tok is None:
+            raise ValueError("Incomplete expression")
+        if not isinstance(tok, str):
+            return ("num", tok)
+        if isinstance(tok, Name):
+            return ("var", str(tok))
+        if tok == "(":
+            node = self.expression()
+            if self.next() != ")":
+                raise ValueError("Missing closing parenthesis")
+            return node
+        if tok in ("-", "+"):
+            return ("neg" if tok == "-" else "pos", self.expression(UNARY_POWER))
+        raise ValueError(f"Unexpected {tok!r}")
+
+def parse(expr):
+    """Parse expr into a tree (see above). Raises ValueError on bad syntax."""
+    if len(expr) > MAX_LENGTH:
+        raise ValueError("Expression is too long")
+    tokens = tokenize(expr)
+    if not tokens:
+        raise ValueError("Empty expression")
+    parser = _Parser(tokens)
+    tree = parser.expression()
+    if parser.pos < len(tokens):
+        raise ValueError(f"Unexpected {tokens[parser.pos]!r}")
+    return tree
+
+# ---------------------------
+# Compiler
+# ---------------------------
+def _too_large():
+    return OverflowError("Result too large")
+
+def _check_bits(value):
+    if isinstance(value, int) and value.bit_length() > MAX_BITS:
+        raise _too_large()
+    return value
+
+def _mul(a, b):
+    # a product has bit_length(a) + bit_length(b) bits, or one less
+    if isinstance(a, int) and isinstance(b, int):
+        if a and b and a.bit_length() + b.bit_length() - 1 > MAX_BITS:
+            raise _too_large()
+        return _check_bits(a * b)
+    return a * b
+
+def _pow(a, b):
+    # a**b has between (bit_length(a) - 1) * b + 1 and bit_length(a) * b bits;
+    # past the lower bound it is refused unseen, otherwise computed (at most
+    # about 2 * MAX_BITS bits) and checked exactly; floats overflow by themselves
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and abs(a) > 1:
+        if (a.bit_length() - 1) * b + 1 > MAX_BITS:
+            raise _too_large()
+        return _check_bits(a ** b)
+    if isinstance(b, int) and abs(b) > MAX_BITS and isinstance(a, float) and a != 0:
+        b = float(b)    # float ** huge int: let the float overflow instead of squaring 10**n times
+    return a ** b
+
+OPERATORS = {
+    "+": operator.add, "-": operator.sub, "*": _mul,
+    "/": operator.truediv, "//": operator.floordiv, "%": operator.mod,
+    "**": _pow,
+}
+LEFT_ASSOC = set(OPERATORS) - RIGHT_ASSOC
+
+def _const(value):
+    return lambda env: value
+
+def _var(name):
+    def lookup(env):
+        try:
+            return env[name]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unknown variable {name!r}") from None
+    return lookup
+
+def compile_tree(tree):
+    """
+    Turn a parse tree into a function of one argument, the environment
+    (a mapping of variable values). Constant subtrees are folded while
+    compiling. Returns (function, constant value or None).
+    """
+    kind = tree[0]
+    if kind == "num":
+        return _const(tree[1]), tree[1]
+    if kind == "var":
+        return _var(tree[1]), None
+    if kind in ("neg", "pos"):
+        inner, value = compile_tree(tree[1])
+        if value is not None:
+            value = -value if kind == "neg" else +value
+            return _const(value), value
+        if kind == "pos":
+            return inner, None
+        return (lambda env: -inner(env)), None
+    if kind in RIGHT_ASSOC or tree[1][0] not in LEFT_ASSOC:
+        # a single operation (or **, which is right-associative)
+        fn = OPERATORS[kind]
+        left, lvalue = compile_tree(tree[1])
+        right, rvalue = compile_tree(tree[2])
+        if lvalue is not None and rvalue is not None:
+            value = fn(lvalue, rvalue)
+            return _const(value), value
+        return (lambda env: fn(left(env), right(env))), None
+    # a chain of left-associative operators (1+2-3+...) is a left-deep tree;
+    # it is compiled into one loop over its operands, so that its length
+    # costs no recursion, neither here nor when it is evaluated
+    chain = []
+    while tree[0] in LEFT_ASSOC:
+        chain.append((OPERATORS[tree[0]], tree[2]))
+        tree = tree[1]
+    first, value = compile_tree(tree)
+    steps = []
+    for fn, operand in reversed(chain):
+        right, rvalue = compile_tree(operand)
+        if value is not None and rvalue is not None:
+            value = fn(value, rvalue)
+            continue
+        if value is not None:
+            first, value = _const(value), None
+        steps.append((fn, right))
+    if value is not None:
+        return _const(value), value
+    if len(steps) == 1:
+        (fn, right), = steps
+        return (lambda env: fn(first(env), right(env))), None
+
+    def run(env):
+        result = first(env)
+        for fn, right in steps:
+            result = fn(result, right(env))
+        return result
+    return run, None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expr(expr):
+    """Compiled form of expr (cached). Errors are raised, not cached."""
+    body, ranges = split_ranges(expr)
+    fn, _ = compile_tree(parse(body))
+    if ranges:
+        return lambda env: evaluate_ranges(fn, ranges, env)
+    return fn
+
+def evaluate(expr, env=None):
+    """Evaluate an arithmetic expression string (a RangeResult if it has ranges)."""
+    return compile_expr(expr.strip())(env)
+
+def cache_info():
+    return compile_expr.cache_info()
+
+# ---------------------------
+# Ranges (NumPy)
+# ---------------------------
+MAX_RANGE = 10**7       # values per ranged expression (a float64 array is 80 MB)
+SAMPLES = 3             # values shown from each end of a range
+BLOCK = 2**18           # values evaluated at once; bounds memory use
+
+FOR_RE = re.compile(r"\s+for\s+")
+RANGE_RE = re.compile(r"""
+    \s*(?P<name>[A-Za-z_]\w*)\s+in\s+
+    (?P<start>.+?)\s*\.\.\s*(?P<stop>.+?)
+    (?:\s+step\s+(?P<step>.+?))?\s*$""", re.VERBOSE)
+
+def split_ranges(expr):
+    """
+    "x*2 for x in 1..10 step 2" -> ("x*2", (("x", 1, 10, 2),)); (expr, ()) without ranges.
+    Bounds and steps may be constant expressions.
+    """
+    if "for" not in expr:
+        return expr, ()
+    parts = FOR_RE.split(expr, maxsplit=1)
+    if len(parts) == 1:
+        return expr, ()
+    body, spec = parts
+    ranges = []
+    for clause in spec.split(","):
+        m = RANGE_RE.match(clause)
+        if not m:
+            raise ValueError(f"Bad range {clause.strip()!r}; use: for x in 1..10 [step 1]")
+        start, stop = evaluate(m.group("start")), evaluate(m.group("stop"))
+        step = evaluate(m.group("step")) if m.group("step") else 1
+        if not all(isinstance(v, (int, float)) for v in (start, stop, step)):
+            raise ValueError("Range bounds must be numbers")
+        if step <= 0:
+            raise ValueError("Range step must be positive")
+        ranges.append((m.group("name"), start, stop, step))
+    names = [r[0] for r in ranges]
+    if len(set(names)) != len(names):
+        raise ValueError("A variable has two ranges")
+    return body, tuple(ranges)
+
+class RangeResult:
+    """Summary of an expression evaluated over ranges of its variables."""
+
+    def __init__(self, names, count, total, low, high, invalid, samples):
+        self.names = names          # range variables, in grid order
+        self.count = count          # number of values
+        self.sum = total            # sum, minimum and maximum of the finite values (nan if none)
+        self.min = low
+        self.max = high
+        self.invalid = invalid      # values that were inf or nan (e.g. division by zero)
+        self.samples = samples      # [(variable values, result)] from both ends
+
+    def __str__(self):
+        text = (f"sum {format_number(self.sum)}, min {format_number(self.min)}, "
+                f"max {format_number(self.max)} over {self.count:,} value{'s' if self.count != 1 else ''}")
+        if self.invalid:
+            text += f" ({self.invalid:,} undefined)"
+        return text
+
+    def describe_samples(self):
+        shown = [", ".join(f"{n}={format_number(v)}" for n, v in zip(self.names, point))
+                 + f": {format_number(y)}" for point, y in self.samples]
+        if self.count > len(self.samples):
+            shown.insert(SAMPLES, "...")
+        return "; ".join(shown)
+
+def format_number(value):
+    """3.0 -> "3" while float64 is exact, otherwise 12 significant digits."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 2**53:
+        return str(int(value))
+    return f"{value:.12g}"
+
+def _range_values(np, start, stop, step):
+    # floor, not int(): 5..4 has no values, though int(-1 + 1e-9) is 0
+    n = math.floor((stop - start) / step + 1e-9) + 1
+    if n <= 0:
+        raise ValueError("Empty range")
+    if n > MAX_RANGE:
+        raise ValueError(f"Range too large (over {MAX_RANGE:,} values)")
+    return start + step * np.arange(n, dtype=np.float64)
+
+def evaluate_ranges(fn, ranges, env=None):
+    """Run a compiled expression over the grid of ranges, BLOCK values at a time."""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ValueError("Ranges need NumPy (pip install numpy)") from None
+    names = [r[0] for r in ranges]
+    axes = [_range_values(np, start, stop, step) for _, start, stop, step in ranges]
+    shape = tuple(len(a) for a in axes)
+    count = 1
+    for n in shape:
+        count *= n
+    if count > MAX_RANGE:
+        raise ValueError(f"Range too large (over {MAX_RANGE:,} values)")
+    scope = dict(env or {})
+    # each variable varies along its own axis, so the grid is formed by broadcasting;
+    # the first axis is cut into blocks to bound the size of the temporaries
+    for k, (name, values) in enumerate(zip(names, axes)):
+        scope[name] = values.reshape((1,) * k + (-1,) + (1,) * (len(shape) - k - 1))
+    rows = max(1, BLOCK // (count // shape[0]))
+    total, low, high, valid = 0.0, float("inf"), float("-inf"), 0
+    with np.errstate(all="ignore"):
+        for lo in range(0, shape[0], rows):
+            block = axes[0][lo:lo + rows]
+            scope[names[0]] = block.reshape((-1,) + (1,) * (len(shape) - 1))
+            result = np.asarray(fn(scope), dtype=np.float64)
+            result = np.broadcast_to(result, (len(block),) + shape[1:])
+            finite = result[np.isfinite(result)]
+            if len(finite):
+                total += float(finite.sum())
+                low = min(low, float(finite.min()))
+                high = max(high, float(finite.max()))
+                valid += len(finite)
+        picks = sorted(set(range(min(SAMPLES, count))) | set(range(max(0, count - SAMPLES), count)))
+        samples = []
+        for flat in picks:
+            point = tuple(a[i] for a, i in zip(axes, np.unravel_index(flat, shape)))
+            scope.update(zip(names, point))
+            samples.append((tuple(map(float, point)), float(fn(scope))))
+    if not valid:
+        total = low = high = float("nan")
+    return RangeResult(names, count, total, low, high, count - valid, samples)
+
+# ---------------------------
+# Worker process with a time and memory budget
+# ---------------------------
+def _limit_memory(budget_mb):
+    try:
+        import resource
+    except ImportError:  # Windows: only the time budget applies
+        return
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        current = 0
+    limit = current + budget_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _serve(conn, memory_mb):
+    _limit_memory(memory_mb)
+    while True:
+        try:
+            expr = conn.recv()
+        except EOFError:
+            return
+        try:
+            reply = (True, evaluate(expr))
+        except MemoryError:
+            reply = (False, MemoryError("Evaluation ran out of memory"))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:  # result or exception that won't pickle
+            conn.send((False, ValueError(str(e))))
+
+class EvalWorker:
+    """
+    Evaluates expressions in a long-lived child process. A call that takes
+    longer than `timeout` seconds kills the child (a new one is started on
+    the next call) and raises TimeoutError; on POSIX the child's address
+    space is also capped, so runaway allocations end in MemoryError.
+    Safe to call from several threads; calls are served one at a time.
+    """
+
+    def __init__(self, timeout=2.0, memory_mb=256):
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.lock = threading.Lock()
+        self.proc = None
+        self.conn = None
+
+    def evaluate(self, expr):
+        with self.lock:
+            if self.proc is None or not self.proc.is_alive():
+                self._start()
+            self.conn.send(expr)
+            if not self.conn.poll(self.timeout):
+                self._stop()
+                raise TimeoutError(f"Evaluation took longer than {self.timeout:g} s")
+            try:
+                ok, value = self.conn.recv()
+            except EOFError:    # child died (e.g. killed for using too much memory)
+                self._stop()
+                raise MemoryError("Evaluation ran out of memory") from None
+        if ok:
+            return value
+        raise value
+
+    def close(self):
+        with self.lock:
+            self._stop()
+
+    def _start(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(target=_serve, args=(child, self.memory_mb),
+                                            name="calc-eval", daemon=True)
+        self.proc.start()
+        child.close()
+
+    def _stop(self):
+        if self.proc is not None:
+            self.proc.kill()
+            self.proc.join()
+            self.conn.close()
+        self.proc = self.conn = None
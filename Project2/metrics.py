@@ -0,0 +1,174 @@
+"""
+Per-stage timings, counters and latency histograms for the voice
+calculator, with an opt-in trace.
+
+    with metrics.timed("calibrate"):
+        recognizer.adjust_for_ambient_noise(source)
+    metrics.count("recognize.google.won")
+    metrics.summary()   # {"calibrate": {"count": 1, "p50_ms": 502.1, "p95_ms": ...}, ...}
+    print(metrics.format_table())
+
+Durations come from time.perf_counter (monotonic). Percentiles are taken
+over the last WINDOW samples of each stage; the histogram (HISTOGRAM_MS
+bucket bounds) and count/total/max cover everything since the last reset.
+
+Tracing is off unless enable_trace() is called or the VOICE_CALC_TRACE
+environment variable names a file. Every timed span is then also kept as
+a Chrome trace event (load the file in chrome://tracing or Perfetto) and
+written by export_trace(), and at exit when VOICE_CALC_TRACE is set.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+
+WINDOW = 1000
+HISTOGRAM_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+MAX_TRACE_EVENTS = 200000
+
+class Stats:
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}       # stage -> deque of recent durations (ms)
+            self.totals = {}        # stage -> [count, total ms, max ms]
+            self.histograms = {}    # stage -> counts per HISTOGRAM_MS bucket, plus overflow
+            self.counters = Counter()
+            self.trace = [] if getattr(self, "trace", None) is not None else None
+            self.trace_dropped = 0
+
+    # --- recording (any thread) ---
+
+    def record(self, stage, ms, start=None):
+        """Add one duration in ms; start is its perf_counter() start, for the trace."""
+        with self.lock:
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+                self.totals[stage] = [0, 0.0, 0.0]
+                self.histograms[stage] = [0] * (len(HISTOGRAM_MS) + 1)
+            samples.append(ms)
+            totals = self.totals[stage]
+            totals[0] += 1
+            totals[1] += ms
+            totals[2] = max(totals[2], ms)
+            self.histograms[stage][_bucket(ms)] += 1
+            if self.trace is not None:
+                if len(self.trace) >= MAX_TRACE_EVENTS:
+                    self.trace_dropped += 1
+                else:
+                    begin = start if start is not None else time.perf_counter() - ms / 1000
+                    self.trace.append({"name": stage, "ph": "X", "pid": os.getpid(),
+                                       "tid": threading.get_ident(),
+                                       "ts": round((begin - self.origin) * 1e6),
+                                       "dur": round(ms * 1000)})
+
+    @contextmanager
+    def timed(self, stage):
+        """Time the with-block as one sample of stage (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, start)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    # --- reporting ---
+
+    def percentile(self, stage, q):
+        """q-th percentile (0-100) of stage's recent samples, nearest rank; None if no samples."""
+        with self.lock:
+            samples = sorted(self.samples.get(stage, ()))
+        return _nearest_rank(samples, q) if samples else None
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, max_ms, histogram}} plus "counters"."""
+        with self.lock:
+            stages = {stage: (sorted(self.samples[stage]), list(self.totals[stage]), list(self.histograms[stage]))
+                      for stage in self.samples}
+            counters = dict(self.counters)
+        out = {}
+        for stage, (samples, (n, total, top), histogram) in sorted(stages.items()):
+            out[stage] = {"count": n, "mean_ms": total / n,
+                          "p50_ms": _nearest_rank(samples, 50), "p95_ms": _nearest_rank(samples, 95),
+                          "max_ms": top,
+                          "histogram": dict(zip([f"<={b}" for b in HISTOGRAM_MS] + [f">{HISTOGRAM_MS[-1]}"],
+                                                histogram))}
+        out["counters"] = dict(sorted(counters.items()))
+        return out
+
+    def format_table(self):
+        """The summary as fixed-width text (stats panel, headless --stats)."""
+        summary = self.summary()
+        counters = summary.pop("counters")
+        lines = [f"{'stage':<20}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        for stage, s in summary.items():
+            lines.append(f"{stage:<20}{s['count']:>6}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['max_ms']:>10.1f}")
+        if counters:
+            lines.append("")
+            lines.extend(f"{name:<30}{n:>6}" for name, n in counters.items())
+        return "\n".join(lines)
+
+    # --- tracing ---
+
+    @property
+    def tracing(self):
+        return self.trace is not None
+
+    def enable_trace(self):
+        with self.lock:
+            if self.trace is None:
+                self.trace = []
+
+    def disable_trace(self):
+        """Stop tracing and discard the recorded spans."""
+        with self.lock:
+            self.trace = None
+            self.trace_dropped = 0
+
+    def export_trace(self, path):
+        """Write the recorded spans as Chrome trace JSON; returns the number of events."""
+        with self.lock:
+            events = list(self.trace or ())
+            dropped = self.trace_dropped
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": dropped, "summary": self.summary()}}, f)
+        return len(events)
+
+def _nearest_rank(samples, q):
+    # samples sorted and non-empty
+    return samples[min(len(samples) - 1, max(0, math.ceil(q / 100 * len(samples)) - 1))]
+
+def _bucket(ms):
+    return bisect_left(HISTOGRAM_MS, ms)
+
+# the process-wide instance the calculator modules record into
+STATS = Stats()
+record = STATS.record
+timed = STATS.timed
+count = STATS.count
+summary = STATS.summary
+format_table = STATS.format_table
+enable_trace = STATS.enable_trace
+disable_trace = STATS.disable_trace
+export_trace = STATS.export_trace
+
+TRACE_PATH = os.environ.get("VOICE_CALC_TRACE")
+if TRACE_PATH:
+    STATS.enable_trace()
+    atexit.register(export_trace, TRACE_PATH)
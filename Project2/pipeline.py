@@ -0,0 +1,220 @@
+"""
+The voice calculator's listen -> recognize -> parse -> evaluate -> speak
+flow as an asyncio pipeline, independent of Tk.
+
+    pipe = Pipeline(recognize=..., evaluate=calc_engine.evaluate, on_event=print)
+    pipe.submit("parse", "five plus seven")    # enters at the parse stage
+    pipe.wait_idle()
+    pipe.close()
+
+Each stage is a task on an event loop running in its own thread, with a
+bounded queue in front of it: a stage that falls behind stops the one
+before it (backpressure), and submit(..., block=True) stops the caller,
+e.g. the continuous listener. Blocking steps (listening, recognition,
+evaluation) run in the loop's thread pool. cancel() abandons everything
+in flight: queued items are dropped and results of steps already running
+are ignored.
+
+on_event(tag, payload) is called on the pipeline thread as each stage
+finishes:
+    ("recognized", response dict)   ("parsed", (text, expr))
+    ("evaluated", (expr, result, error))   ("error", (stage, exception))
+A GUI should hand these to its own thread (VoiceCalculatorApp wakes Tk
+with a virtual event rather than polling).
+
+Every step is timed into metrics under its stage name, and the time from
+submit() to the end of evaluation under "end_to_end"; failures, drops and
+cancellations are counted, as are exceptions raised by on_event (which
+are printed and otherwise ignored).
+
+Run directly, it evaluates transcripts from stdin headlessly:
+    echo "what is twelve divided by three point five" | python pipeline.py
+    python pipeline.py --stats --trace trace.json < transcripts.txt
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+import calc_engine
+import metrics
+from spoken_math import text_to_expression
+
+STAGES = ("listen", "recognize", "parse", "evaluate", "speak")
+BLOCKING = {"listen", "recognize", "evaluate"}     # run in the thread pool
+
+class Pipeline:
+
+    def __init__(self, listen=None, recognize=None, parse=text_to_expression,
+                 evaluate=calc_engine.evaluate, speak=None, on_event=None, maxsize=2):
+        self.steps = {"listen": listen, "recognize": recognize, "parse": parse,
+                      "evaluate": evaluate, "speak": speak}
+        self.on_event = on_event or (lambda tag, payload: None)
+        self.maxsize = maxsize
+        self.generation = 0         # bumped by cancel(); older items are dropped
+        self.dropped = 0
+        self.in_flight = 0
+        self.idle = threading.Condition()
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), name="pipeline", daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    # --- any thread ---
+
+    def submit(self, stage, item=None, block=False):
+        """
+        Feed item into `stage`. With block=True, wait while that stage's
+        queue is full; otherwise the oldest queued item makes room.
+        """
+        entry = (self.generation, time.perf_counter(), item)
+        with self.idle:
+            self.in_flight += 1
+        if block:
+            asyncio.run_coroutine_threadsafe(self.queues[stage].put(entry), self.loop).result()
+        else:
+            self.loop.call_soon_threadsafe(self._offer, stage, entry)
+
+    def cancel(self):
+        """Drop everything queued and ignore results of steps still running."""
+        self.generation += 1
+        metrics.count("pipeline.cancelled")
+        self.loop.call_soon_threadsafe(self._drain)
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted item has left the pipeline."""
+        with self.idle:
+            return self.idle.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def close(self, timeout=None):
+        """
+        Stop the loop and wait up to `timeout` seconds for its thread;
+        returns True if it has stopped. A GUI closing its window should
+        pass a timeout: on_event may be waiting for that GUI's thread.
+        """
+        self.generation += 1
+        self.loop.call_soon_threadsafe(self._drain)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    # --- pipeline thread ---
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.queues = {name: asyncio.Queue(self.maxsize) for name in STAGES}
+        self.tasks = [self.loop.create_task(self._stage(name)) for name in STAGES]
+        ready.set()
+        self.loop.run_forever()
+        for task in self.tasks:
+            task.cancel()
+        self.loop.run_until_complete(asyncio.gather(*self.tasks, return_exceptions=True))
+        self.loop.close()
+
+    async def _stage(self, name):
+        inbox = self.queues[name]
+        while True:
+            generation, submitted, item = await inbox.get()
+            step = self.steps[name]
+            passed_on = False
+            try:
+                nxt = None
+                if generation == self.generation and step is not None:
+                    start = time.perf_counter()
+                    try:
+                        if name in BLOCKING:
+                            out = await self.loop.run_in_executor(None, step, item)
+                        else:
+                            out = step(item)
+                        error = None
+                    except Exception as e:
+                        out, error = None, e
+                        metrics.count(f"{name}.errors")
+                    now = time.perf_counter()
+                    metrics.record(name, (now - start) * 1000, start)
+                    if name == "evaluate":
+                        metrics.record("end_to_end", (now - submitted) * 1000, submitted)
+                    if generation == self.generation:
+                        try:
+                            nxt = self._handle(name, item, out, error)
+                        except Exception:
+                            # a failing on_event must not stop the stage
+                            metrics.count("pipeline.event_errors")
+                            traceback.print_exc()
+                if nxt is not None:
+                    await self.queues[nxt[0]].put((generation, submitted, nxt[1]))
+                    passed_on = True
+            finally:
+                if not passed_on:
+                    self._finished()
+
+    def _handle(self, name, item, out, error):
+        """Report a finished step; returns (next stage, item) or None."""
+        if name == "evaluate":
+            self.on_event("evaluated", (item, out, error))
+            return ("speak", out) if error is None and self.steps["speak"] else None
+        if error is not None:
+            self.on_event("error", (name, error))
+            return None
+        if name == "listen":
+            return ("recognize", out)
+        if name == "recognize":
+            self.on_event("recognized", out)
+            return ("parse", out["transcription"]) if out["success"] else None
+        if name == "parse":
+            self.on_event("parsed", (item, out))
+            return ("evaluate", out) if out else None
+        return None
+
+    def _offer(self, stage, entry):
+        q = self.queues[stage]
+        if q.full():
+            q.get_nowait()
+            self.dropped += 1
+            metrics.count("pipeline.dropped")
+            self._finished()
+        q.put_nowait(entry)
+
+    def _drain(self):
+        for q in self.queues.values():
+            while not q.empty():
+                q.get_nowait()
+                self._finished()
+
+    def _finished(self):
+        with self.idle:
+            self.in_flight -= 1
+            self.idle.notify_all()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate spoken-math transcripts from stdin, one per line.")
+    parser.add_argument("--stats", action="store_true", help="print per-stage timings on stderr at the end")
+    parser.add_argument("--trace", metavar="PATH", help="write a Chrome trace (JSON) of every stage")
+    args = parser.parse_args(argv)
+    if args.trace:
+        metrics.enable_trace()
+
+    def show(tag, payload):
+        if tag == "evaluated":
+            expr, result, error = payload
+            print(f"{expr} = {result}" if error is None else f"{expr}: {error}", flush=True)
+        elif tag == "parsed" and not payload[1]:
+            print(f"{payload[0]!r}: couldn't parse", flush=True)
+        elif tag == "error":
+            print(f"{payload[0]} error: {payload[1]}", flush=True)
+    pipe = Pipeline(on_event=show)
+    for line in sys.stdin:
+        if line.strip():
+            pipe.submit("parse", line.strip(), block=True)
+    pipe.wait_idle()
+    pipe.close()
+    if args.stats:
+        print(metrics.format_table(), file=sys.stderr)
+    if args.trace:
+        metrics.export_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
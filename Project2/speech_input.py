@@ -0,0 +1,269 @@
+"""
+Microphone input: cached ambient-noise calibration, a continuous
+listening mode, and recognizer backends raced against each other.
+
+Calibrating (adjust_for_ambient_noise) costs half a second of recording
+before listening can start, so it is done once and then only when the
+last calibration is older than CALIBRATION_MAX_AGE. ContinuousListener
+keeps the microphone stream open on a background thread and cuts it
+into phrases with the recognizer's energy-based voice activity detection
+(dynamic threshold, phrase ends after `pause_threshold` seconds of
+silence), so back-to-back phrases start without any set-up delay.
+
+race() runs several recognizer backends on the same audio at once, each
+with its own timeout, and returns the first transcription that the
+caller accepts; the worst case is the slowest timeout instead of the
+sum of all of them. Each backend call gets its own daemon thread, so one
+that hangs past its timeout cannot hold up later races; a backend with
+MAX_STUCK such calls still running is left out until they return.
+
+Calibrations and each backend's recognitions are timed into metrics
+("calibrate", "recognize.<backend>"), with counters for skipped
+calibrations and for the wins, errors, timeouts and skips of every backend.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, Future, wait
+
+import speech_recognition as sr
+
+import metrics
+
+CALIBRATION_SECONDS = 0.5
+CALIBRATION_MAX_AGE = 60.0
+
+def calibrate(recognizer, source, max_age=CALIBRATION_MAX_AGE):
+    """Adjust recognizer to the room noise unless it was done in the last max_age seconds."""
+    last = getattr(recognizer, "calibrated_at", None)
+    if last is not None and time.monotonic() - last < max_age:
+        metrics.count("calibrate.skipped")
+        return False
+    with metrics.timed("calibrate"):
+        recognizer.adjust_for_ambient_noise(source, duration=CALIBRATION_SECONDS)
+    recognizer.calibrated_at = time.monotonic()
+    return True
+
+class ContinuousListener:
+    """
+    Listens until stop(), handing each phrase (sr.AudioData) to on_phrase
+    on the listening thread; on_phrase should return quickly, e.g. by
+    starting recognition elsewhere. Errors opening or reading the
+    microphone go to on_error(message) and end the listening.
+    """
+
+    def __init__(self, recognizer, microphone, on_phrase, on_error=print,
+                 recalibrate_every=CALIBRATION_MAX_AGE, phrase_time_limit=6, pause_threshold=0.6):
+        self.recognizer = recognizer
+        self.microphone = microphone
+        self.on_phrase = on_phrase
+        self.on_error = on_error
+        self.recalibrate_every = recalibrate_every
+        self.phrase_time_limit = phrase_time_limit
+        self.pause_threshold = pause_threshold
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="listener", daemon=True)
+        self.thread.start()
+
+    def stop(self, wait=True):
+        """Stop after the phrase being recorded (at most about a second when idle)."""
+        self.stopping.set()
+        if wait and self.running and threading.current_thread() is not self.thread:
+            self.thread.join()
+
+    def _run(self):
+        recognizer = self.recognizer
+        recognizer.dynamic_energy_threshold = True
+        recognizer.pause_threshold = self.pause_threshold
+        recognizer.non_speaking_duration = min(recognizer.non_speaking_duration, self.pause_threshold)
+        try:
+            with self.microphone as source:
+                while not self.stopping.is_set():
+                    calibrate(recognizer, source, self.recalibrate_every)
+                    try:
+                        # short timeout so stop() and recalibration are noticed while it is quiet
+                        audio = recognizer.listen(source, timeout=1, phrase_time_limit=self.phrase_time_limit)
+                    except sr.WaitTimeoutError:
+                        continue
+                    if not self.stopping.is_set():
+                        self.on_phrase(audio)
+        except Exception as e:
+            self.on_error(f"Microphone error: {e}")
+
+# ---------------------------
+# Recognizer backends
+# ---------------------------
+class Backend:
+    """
+    A speech-to-text service. recognize(audio, cancel) returns the
+    transcription or raises; cancel is a threading.Event set once the race
+    is decided, which backends that can give up early should watch.
+    """
+    name = "backend"
+    timeout = 6.0
+
+    def recognize(self, audio, cancel):
+        raise NotImplementedError
+
+class SphinxBackend(Backend):
+    """pocketsphinx, offline."""
+    name = "sphinx"
+
+    def __init__(self, recognizer, timeout=6.0):
+        self.recognizer = recognizer
+        self.timeout = timeout
+
+    def recognize(self, audio, cancel):
+        return self.recognizer.recognize_sphinx(audio)
+
+class GoogleBackend(Backend):
+    """Google Web Speech API, online."""
+    name = "google"
+
+    def __init__(self, recognizer, timeout=6.0):
+        self.recognizer = recognizer
+        self.timeout = timeout
+
+    def recognize(self, audio, cancel):
+        return self.recognizer.recognize_google(audio)
+
+class StandInBackend(Backend):
+    """
+    Local stand-in for tests and benchmarks: answers `text` (or raises
+    `error`) after `delay` seconds. With hang=True it ignores `cancel`
+    and sleeps through the whole delay, like a stuck network call.
+    """
+
+    def __init__(self, text=None, delay=0.0, error=None, name="stand-in", timeout=6.0, hang=False):
+        self.text = text
+        self.delay = delay
+        self.error = error
+        self.name = name
+        self.timeout = timeout
+        self.hang = hang
+
+    def recognize(self, audio, cancel):
+        if self.hang:
+            time.sleep(self.delay)
+        elif cancel.wait(self.delay):
+            raise CancelledError()
+        if self.error is not None:
+            raise self.error
+        if self.text is None:
+            raise sr.UnknownValueError()
+        return self.text
+
+def default_backends(recognizer):
+    return [SphinxBackend(recognizer), GoogleBackend(recognizer)]
+
+MAX_STUCK = 2       # calls per backend still running after their race, before it is left out
+
+_stuck = {}         # backend name -> calls still running after their race ended
+_stuck_lock = threading.Lock()
+
+def _recognize(backend, audio, cancel):
+    start = time.perf_counter()
+    try:
+        return backend.recognize(audio, cancel)
+    finally:
+        # a loser stopped by `cancel` says nothing about how fast the backend is
+        if not cancel.is_set():
+            metrics.record(f"recognize.{backend.name}", (time.perf_counter() - start) * 1000, start)
+
+def _start(backend, audio, cancel):
+    """
+    Run one recognition on its own daemon thread; returns its Future. A
+    backend that hangs ties up only that thread, never a later race, and
+    does not keep the interpreter from exiting.
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+    future.returned = future.abandoned = False     # guarded by _stuck_lock
+
+    def run():
+        try:
+            future.set_result(_recognize(backend, audio, cancel))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with _stuck_lock:
+                future.returned = True
+                if future.abandoned:
+                    _stuck[backend.name] -= 1
+    threading.Thread(target=run, name=f"recognizer-{backend.name}", daemon=True).start()
+    return future
+
+def race(audio, backends, accept=bool):
+    """
+    Run backends concurrently on audio. Returns the recognize_speech_from_mic
+    dict plus "backend": the first transcription for which accept(text) is
+    true wins; if none is accepted, the first non-empty one is returned so
+    the caller can still show what was heard.
+    """
+    cancel = threading.Event()
+    start = time.monotonic()
+    order = {}
+    deadlines = {}
+    for i, backend in enumerate(backends):
+        with _stuck_lock:
+            stuck = _stuck.get(backend.name, 0)
+        if stuck >= MAX_STUCK:
+            # earlier calls never came back; don't pile up more threads on it
+            metrics.count(f"recognize.{backend.name}.skipped")
+            continue
+        f = _start(backend, audio, cancel)
+        order[f] = (i, backend)
+        deadlines[f] = start + backend.timeout
+    pending = set(order)
+    fallback = None
+    errors = []
+    try:
+        while pending:
+            now = time.monotonic()
+            for f in [f for f in pending if deadlines[f] <= now]:
+                pending.discard(f)
+                errors.append(TimeoutError())
+                metrics.count(f"recognize.{order[f][1].name}.timeout")
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=min(deadlines[f] for f in pending) - now,
+                                 return_when=FIRST_COMPLETED)
+            for f in sorted(done, key=lambda f: order[f][0]):
+                name = order[f][1].name
+                try:
+                    text = f.result()
+                except Exception as e:
+                    errors.append(e)
+                    metrics.count(f"recognize.{name}.error")
+                    continue
+                if text and accept(text):
+                    metrics.count(f"recognize.{name}.won")
+                    return {"success": True, "error": None, "transcription": text, "backend": name}
+                if text and fallback is None:
+                    fallback = (text, name)
+    finally:
+        # the losers' results are ignored; those that watch `cancel` stop early
+        cancel.set()
+        with _stuck_lock:
+            for f, (_, backend) in order.items():
+                if not f.returned:
+                    f.abandoned = True
+                    _stuck[backend.name] = _stuck.get(backend.name, 0) + 1
+    if fallback:
+        return {"success": True, "error": None, "transcription": fallback[0], "backend": fallback[1]}
+    if any(isinstance(e, sr.RequestError) for e in errors):
+        error = "Speech service unavailable/unresponsive and no other recognizer understood the audio."
+    elif errors and all(isinstance(e, TimeoutError) for e in errors):
+        error = "Speech recognition timed out"
+    else:
+        error = "Unable to recognize speech"
+    return {"success": False, "error": error, "transcription": None, "backend": None}
@@ -0,0 +1,212 @@
+"""
+Text-to-speech on one long-lived worker thread.
+
+    speaker = SpeechWorker()
+    speaker.prerender("The result is")
+    speaker.say("The result is", "42")
+
+The worker creates and owns the pyttsx3 engine, so calls never race on it.
+say() supersedes whatever is queued and interrupts what is playing: only
+the newest result is spoken. An utterance is a sequence of parts; parts
+that are already rendered to WAV (prerender(), or any part spoken a few
+times) are played from the cache instead of being synthesized again. The
+cache is an LRU of at most `cache_size` files and needs a WAV player,
+which the standard library only has on Windows (winsound); elsewhere
+everything is synthesized live and no cache directory is created.
+close() stops the worker and removes the temporary cache.
+
+metrics() reports the latency from say() to the start of audio; the same
+latency is recorded as the "tts" stage in the metrics module.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict, deque
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+import metrics
+
+def default_engine():
+    import pyttsx3
+    return pyttsx3.init()
+
+class WinsoundPlayer:
+    """Plays WAV files with winsound; stop() may be called from any thread."""
+
+    def __init__(self):
+        self.stopped = threading.Event()
+
+    def play(self, path):
+        with wave.open(path, "rb") as w:
+            duration = w.getnframes() / float(w.getframerate())
+        self.stopped.clear()
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        if self.stopped.wait(duration):
+            winsound.PlaySound(None, 0)
+
+    def stop(self):
+        self.stopped.set()
+
+class SpeechWorker:
+    RENDER_AFTER = 3    # times a part is spoken before it is rendered to the cache
+
+    def __init__(self, engine_factory=default_engine, cache_size=32, cache_dir=None, player=None):
+        self.engine_factory = engine_factory
+        self.engine = None
+        self.player = player if player is not None else (WinsoundPlayer() if winsound else None)
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir      # a temporary one is made on the first render
+        self.own_cache_dir = False
+        self.cache = OrderedDict()      # text -> rendered WAV path, least recently used first
+        self.spoken = {}                # text -> times spoken live
+        self.renders = deque()          # parts waiting to be rendered when idle
+        self.cond = threading.Condition()
+        self.pending = None             # (generation, parts, submit time), newest only
+        self.generation = 0
+        self.closing = False
+        self.latencies = deque(maxlen=200)  # ms from say() to first audio
+        self.superseded = 0
+        self.current = 0                # generation being spoken (worker thread)
+        self.submitted = None           # its say() time, until audio starts
+        self.thread = threading.Thread(target=self._run, name="tts", daemon=True)
+        self.thread.start()
+
+    def say(self, *parts):
+        """Speak parts in order, dropping or interrupting anything older."""
+        parts = [p for p in parts if p]
+        with self.cond:
+            if self.pending is not None:
+                self.superseded += 1
+                metrics.count("tts.superseded")
+            self.generation += 1
+            self.pending = (self.generation, parts, time.perf_counter())
+            self.cond.notify()
+        if self.player:
+            self.player.stop()
+
+    def stop(self):
+        """Silence the current utterance and drop queued ones."""
+        with self.cond:
+            self.generation += 1
+            self.pending = None
+        if self.player:
+            self.player.stop()
+
+    def prerender(self, *phrases):
+        """Render phrases to the cache while idle, so they start playing instantly."""
+        if not self.player:
+            return
+        with self.cond:
+            self.renders.extend(phrases)
+            self.cond.notify()
+
+    def close(self):
+        self.stop()
+        with self.cond:
+            self.closing = True
+            self.cond.notify()
+        self.thread.join(timeout=5)
+        if self.own_cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def metrics(self):
+        with self.cond:
+            samples = list(self.latencies)
+            m = {"utterances": len(samples), "superseded": self.superseded,
+                 "cached_phrases": len(self.cache)}
+        m["last_latency_ms"] = samples[-1] if samples else 0.0
+        m["avg_latency_ms"] = sum(samples) / len(samples) if samples else 0.0
+        m["max_latency_ms"] = max(samples, default=0.0)
+        return m
+
+    # --- worker thread ---
+
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+            self.engine.connect("started-utterance", self._on_start)
+            self.engine.connect("started-word", self._on_word)
+        except Exception as e:
+            print("TTS error:", e)
+            return
+        while True:
+            with self.cond:
+                while self.pending is None and not self.renders and not self.closing:
+                    self.cond.wait()
+                if self.closing:
+                    return
+                item, self.pending = self.pending, None
+                render = self.renders.popleft() if item is None else None
+            try:
+                if item is not None:
+                    self._speak(*item)
+                elif render not in self.cache:
+                    self._render(render)
+            except Exception as e:
+                print("TTS error:", e)
+
+    def _speak(self, generation, parts, submitted):
+        self.current = generation
+        self.submitted = submitted
+        for part in parts:
+            if generation != self.generation:
+                return
+            path = self.cache.get(part)
+            if path:
+                self.cache.move_to_end(part)
+                self._started()
+                self.player.play(path)
+                continue
+            self.engine.say(part)
+            self.engine.runAndWait()
+            if len(self.spoken) > 1000:
+                self.spoken.clear()     # keep the counts for recent phrases only
+            count = self.spoken[part] = self.spoken.get(part, 0) + 1
+            if self.player and count == self.RENDER_AFTER:
+                with self.cond:
+                    self.renders.append(part)
+
+    def _render(self, text):
+        generation = self.current = self.generation
+        if self.cache_dir is None:
+            self.cache_dir = tempfile.mkdtemp(prefix="calc-tts-")
+            self.own_cache_dir = True
+        path = os.path.join(self.cache_dir, f"{time.monotonic_ns()}.wav")
+        self.engine.save_to_file(text, path)
+        self.engine.runAndWait()
+        if generation != self.generation:
+            # interrupted by say(); try again when idle
+            with self.cond:
+                self.renders.append(text)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        if not os.path.exists(path):
+            return
+        self.cache[text] = path
+        while len(self.cache) > self.cache_size:
+            _, old = self.cache.popitem(last=False)
+            os.remove(old)
+
+    def _started(self):
+        if self.submitted is not None:
+            ms = (time.perf_counter() - self.submitted) * 1000
+            with self.cond:
+                self.latencies.append(ms)
+            metrics.record("tts", ms, self.submitted)
+            self.submitted = None
+
+    def _on_start(self, name):
+        self._started()
+
+    def _on_word(self, name, location, length):
+        # runs inside runAndWait on this thread, the safe place to stop the engine
+        if self.current != self.generation:
+            self.engine.stop()
@@ -0,0 +1,322 @@
+"""
+Spoken text -> arithmetic expression, in one pass over the words.
+
+    text_to_expression("what is one hundred twenty three plus four")  # "123+4"
+    text_to_expression("twelve divided by three point five")          # "12/3.5"
+    text_to_expression("x times two plus one for x from one to a million")
+                                                      # "x*2+1 for x in 1..1000000"
+
+The text is split into words, digits and operator symbols by precompiled
+regexes. Operator words and phrases ("divided by", "to the power
+of") are matched longest-first with a word trie built from OP_MAP and
+OP_PHRASES, and numbers are read by a small state machine covering units,
+teens, tens, hundreds, thousands, millions and billions, plus decimals
+after "point". Every word is looked at a bounded number of times, so the
+cost is linear in the length of the transcript. Words that are neither
+numbers nor operators ("what", "is", "please") are skipped.
+
+"for x from A to B [step C]" clauses declare range variables (calc_engine
+range syntax); a declared variable is kept in the expression even where
+the word would otherwise be an operator ("x" for times).
+"""
+import re
+from decimal import Decimal
+
+# Basic mapping for operator words
+OP_MAP = {
+    'plus': '+', 'add': '+', 'added': '+',
+    'minus': '-', 'subtract': '-', 'less': '-',
+    'times': '*', 'x': '*', 'multiply': '*', 'multiplied': '*',
+    'into': '*',
+    'divide': '/', 'divided': '/', 'over': '/',
+    'by': '/',  # often appears in 'divided by' - handled contextually
+    'mod': '%', 'modulo': '%'
+}
+# Operators spoken as several words; matched before the single words above
+OP_PHRASES = {
+    'divided by': '/',
+    'multiplied by': '*',
+    'to the power of': '**',
+}
+
+# Basic words to numbers (0-19)
+NUM_WORDS = {
+    'zero':0, 'one':1, 'two':2, 'three':3, 'four':4, 'five':5, 'six':6,
+    'seven':7, 'eight':8, 'nine':9, 'ten':10, 'eleven':11, 'twelve':12,
+    'thirteen':13, 'fourteen':14, 'fifteen':15, 'sixteen':16, 'seventeen':17,
+    'eighteen':18, 'nineteen':19
+}
+TENS = {
+    'twenty':20, 'thirty':30, 'forty':40, 'fifty':50,
+    'sixty':60, 'seventy':70, 'eighty':80, 'ninety':90
+}
+SCALES = {'thousand': 10**3, 'million': 10**6, 'billion': 10**9}
+
+# "for x from one to ten step two", "and y between one and five"
+RANGE_FROM = {'from', 'in', 'between'}
+RANGE_TO = {'to', 'through', 'until', 'and'}
+RANGE_STEP = {'step', 'steps', 'by'}
+
+OPERATORS = set(OP_MAP.values()) | set(OP_PHRASES.values())
+SYMBOLS = set('+-*/()%.')
+
+# words, numbers written with digits, operator symbols; everything else is dropped
+TOKEN_RE = re.compile(r"[a-z]+|\d+(?:\.\d+)?|[-+*/()%.]")
+DIGITS_RE = re.compile(r"\d+")
+WORD_HYPHEN_RE = re.compile(r"(?<=[a-z])-(?=[a-z])")
+
+# ---------------------------
+# Word trie
+# ---------------------------
+# Each node is a dict from word to child node; the key None holds what the
+# words up to that node stand for. Number words are in the same trie so a
+# single lookup classifies a word.
+_END = None
+
+def _build_trie():
+    trie = {}
+    def put(phrase, value):
+        node = trie
+        for w in phrase.split():
+            node = node.setdefault(w, {})
+        node[_END] = value
+    for word, op in OP_MAP.items():
+        put(word, ("op", op))
+    for phrase, op in OP_PHRASES.items():
+        put(phrase, ("op", op))
+    for word, n in NUM_WORDS.items():
+        put(word, ("unit" if n < 10 else "teen", n))
+    for word, n in TENS.items():
+        put(word, ("tens", n))
+    put("hundred", ("hundred", 100))
+    for word, n in SCALES.items():
+        put(word, ("scale", n))
+    put("point", ("point", None))
+    put("and", ("and", None))
+    put("negative", ("negative", None))
+    return trie
+
+TRIE = _build_trie()
+_NO_MATCH = (None, None)
+
+def classify(word):
+    """(kind, value) of a single word, or (None, None)."""
+    node = TRIE.get(word)
+    return node.get(_END, _NO_MATCH) if node else _NO_MATCH
+
+def match_op(tokens, i):
+    """Longest operator phrase starting at tokens[i]: (operator, next_i) or (None, i)."""
+    node = TRIE
+    found = (None, i)
+    j = i
+    while j < len(tokens):
+        node = node.get(tokens[j])
+        if node is None:
+            break
+        j += 1
+        value = node.get(_END)
+        if value is not None and value[0] == "op":
+            found = (value[1], j)
+    return found
+
+# ---------------------------
+# Numbers
+# ---------------------------
+def words_to_number(tokens, i):
+    """
+    Parse a number starting at tokens[i].
+    Returns (number_as_string, new_index), or (None, i) if there is none.
+    Example: ['one', 'hundred', 'twenty', 'one'] -> ('121', i+4)
+    Handles decimals with the word 'point' (also before a scale, as in
+    "three point five million") and leading 'negative's. A bare
+    'hundred' or scale word is only a number after 'a'/'an' ("a million").
+    """
+    n = len(tokens)
+    start = i
+    negatives = 0
+    while i < n and tokens[i] == 'negative':
+        negatives += 1
+        i += 1
+    total = group = 0
+    last = None                 # kind of the previous word in this number
+    has_hundred = False         # group already has its hundreds
+    scale_cap = None            # scales must shrink: "two million five thousand"
+    j = i
+    while j < n:
+        w = tokens[j]
+        kind, value = classify(w)
+        if kind is None and w[0].isdigit():
+            if last is not None:
+                break
+            # "3.5 million": Decimal keeps the digits exact when scaled
+            kind, value = "digits", Decimal(w) if '.' in w else int(w)
+        if kind in ("unit", "teen"):
+            if not (last in (None, "hundred", "scale", "and")
+                    or (last == "tens" and kind == "unit" and value)):
+                break
+            group += value
+        elif kind == "tens":
+            if last not in (None, "hundred", "scale", "and"):
+                break
+            group += value
+        elif kind == "digits":
+            group = value
+        elif kind == "hundred":
+            if last is None:
+                if not _after_article(tokens, j):
+                    break
+                group = 100
+            elif last in ("unit", "teen", "tens", "digits") and not has_hundred:
+                group *= 100
+            else:
+                break
+            has_hundred = True
+        elif kind == "scale":
+            if (scale_cap is not None and value >= scale_cap) or last in ("scale", "and"):
+                break
+            if last is None and not _after_article(tokens, j):
+                break
+            scaled = (group if last is not None else 1) * value
+            if isinstance(scaled, Decimal):
+                # "3.5 million" is the int 3500000; "1.2345 thousand" stays 1234.5
+                scaled = int(scaled) if scaled == scaled.to_integral_value() else scaled.normalize()
+            total += scaled
+            group = 0
+            has_hundred = False
+            scale_cap = value
+        elif kind == "and":
+            # "one hundred and five"; only inside a number, before more of it
+            if last not in ("hundred", "scale") or j + 1 >= n or \
+                    classify(tokens[j + 1])[0] not in ("unit", "teen", "tens"):
+                break
+        elif kind == "point":
+            decimals, k = _decimals(tokens, j + 1)
+            if not decimals or isinstance(group, Decimal):
+                break
+            # only a scale word may follow the decimals
+            group = Decimal(f"{group}.{decimals}")
+            last = "decimals"
+            j = k
+            continue
+        else:
+            break
+        last = kind
+        j += 1
+    if j == i:
+        return None, start
+    # "negative negative five" is 5
+    return ('-' if negatives % 2 else '') + str(total + group), j
+
+def _after_article(tokens, j):
+    return j > 0 and tokens[j - 1] in ('a', 'an')
+
+def _decimals(tokens, j):
+    """Digits after 'point': single digit words or numbers written with digits."""
+    digits = []
+    while j < len(tokens):
+        kind, value = classify(tokens[j])
+        if kind == "unit":
+            digits.append(str(value))
+        elif DIGITS_RE.fullmatch(tokens[j]):
+            digits.append(tokens[j])
+        else:
+            break
+        j += 1
+    return "".join(digits), j
+
+# ---------------------------
+# Ranges
+# ---------------------------
+def _is_variable(word):
+    return word.isalpha() and classify(word)[0] not in ("unit", "teen", "tens", "hundred", "scale")
+
+def declared_variables(tokens):
+    """Variables named in range clauses ("for x from ...")."""
+    return {tokens[i + 1] for i in range(len(tokens) - 2)
+            if tokens[i] in ('for', 'and') and tokens[i + 2] in RANGE_FROM and _is_variable(tokens[i + 1])}
+
+def _bound(tokens, i):
+    # "to a million"
+    if i < len(tokens) and tokens[i] in ('a', 'an'):
+        i += 1
+    return words_to_number(tokens, i) if i < len(tokens) else (None, i)
+
+def range_clause(tokens, i):
+    """
+    "x from one to ten [step two]" starting at tokens[i] (after 'for').
+    Returns ("x in 1..10 step 2", new_index), or (None, i).
+    """
+    n = len(tokens)
+    if i + 2 >= n or not _is_variable(tokens[i]) or tokens[i + 1] not in RANGE_FROM:
+        return None, i
+    start, j = _bound(tokens, i + 2)
+    if start is None or j >= n or tokens[j] not in RANGE_TO:
+        return None, i
+    stop, j = _bound(tokens, j + 1)
+    if stop is None:
+        return None, i
+    clause = f"{tokens[i]} in {start}..{stop}"
+    k = j
+    if tokens[k:k + 3] == ['in', 'steps', 'of']:
+        k += 3
+    elif k < n and tokens[k] in RANGE_STEP:
+        k += 1
+    if k != j:
+        step, k = _bound(tokens, k)
+        if step is not None:
+            clause += f" step {step}"
+            j = k
+    return clause, j
+
+# ---------------------------
+# Text -> expression
+# ---------------------------
+def tokenize(text):
+    # "twenty-one" is one number, so only hyphens between words are dropped
+    return TOKEN_RE.findall(WORD_HYPHEN_RE.sub(" ", text.lower()))
+
+def text_to_expression(text: str) -> str:
+    """
+    Convert spoken text into a math expression string.
+    Examples:
+      "five plus seven" -> "5+7"
+      "what is twelve divided by three point five" -> "12/3.5"
+      "x times two for x from one to ten" -> "x*2 for x in 1..10"
+    """
+    tokens = tokenize(text)
+    variables = declared_variables(tokens)
+    out = []
+    ranges = []
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        if variables:
+            if tok in ('for', 'and') and i + 1 < len(tokens):
+                clause, j = range_clause(tokens, i + 1)
+                if clause is not None:
+                    ranges.append(clause)
+                    i = j
+                    continue
+            if tok in variables:
+                out.append(tok)
+                i += 1
+                continue
+        op, j = match_op(tokens, i)
+        if op is not None:
+            # a lone 'by' after an operator word ("multiply ... by") adds nothing
+            if not (tok == 'by' and j == i + 1 and out and out[-1] in OPERATORS):
+                out.append(op)
+            i = j
+            continue
+        num, j = words_to_number(tokens, i)
+        if num is not None:
+            out.append(num)
+            i = j
+            continue
+        if tok in SYMBOLS:
+            out.append(tok)
+        # anything else is a filler word
+        i += 1
+    if ranges:
+        out.append(" for " + ", ".join(ranges))
+    return "".join(out)
@@ -1,271 +1,78 @@
 import threading
-import re
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import queue
 import time
 
-# Speech + TTS (may require installation)
-import speech_recognition as sr
-import pyttsx3
+import calc_engine
+import metrics
+from pipeline import Pipeline
+from speech_output import SpeechWorker
+from spoken_math import text_to_expression
+
+# Speech + TTS (may require installation): speech_recognition (and speech_input,
+# which needs it) and pyttsx3 are imported on first use, so this module and the
+# keypad work without them and the window doesn't wait for them.
 
 # ---------------------------
 # Utility: safe eval for math
 # ---------------------------
-ALLOWED_CHARS_RE = re.compile(r'^[0-9\s\.\+\-\*\/\(\)]+$')
-
 def safe_eval(expr: str):
-    # remove spaces
-    expr = expr.strip()
-    if not expr:
-        raise ValueError("Empty expression")
-    # basic safety check: only allow digits, operators, parentheses, dot and spaces
-    if not ALLOWED_CHARS_RE.match(expr):
-        raise ValueError("Disallowed characters in expression.")
-    # Evaluate
-    try:
-        # eval is safe-ish here because we've restricted characters above
-        return eval(expr, {"__builtins__": None}, {})
-    except Exception as e:
-        raise
+    # parsed and evaluated by calc_engine (no eval()); compiled expressions are cached
+    return calc_engine.evaluate(expr)
 
 # ---------------------------
-# Text -> expression parsing
-# ---------------------------
-# Basic mapping for operator words
-OP_MAP = {
-    'plus': '+', 'add': '+', 'added': '+',
-    'minus': '-', 'subtract': '-', 'less': '-',
-    'times': '*', 'x': '*', 'multiply': '*', 'multiplied': '*',
-    'into': '*',
-    'divide': '/', 'divided': '/', 'over': '/',
-    'by': '/',  # often appears in 'divided by' - handled contextually
-    'mod': '%', 'modulo': '%'
-}
-
-# Basic words to numbers (0-19)
-NUM_WORDS = {
-    'zero':0, 'one':1, 'two':2, 'three':3, 'four':4, 'five':5, 'six':6,
-    'seven':7, 'eight':8, 'nine':9, 'ten':10, 'eleven':11, 'twelve':12,
-    'thirteen':13, 'fourteen':14, 'fifteen':15, 'sixteen':16, 'seventeen':17,
-    'eighteen':18, 'nineteen':19
-}
-TENS = {
-    'twenty':20, 'thirty':30, 'forty':40, 'fifty':50,
-    'sixty':60, 'seventy':70, 'eighty':80, 'ninety':90
-}
-
-def words_to_number(tokens, i):
-    """
-    Try to parse a number starting at tokens[i].
-    Returns (number_as_string, new_index)
-    Example: tokens = ['twenty', 'one'] -> returns ('21', i+2)
-    Handles decimals with the word 'point'.
-    """
-    num = 0
-    consumed = 0
-    got_any = False
-    # Handle optional sign words (not common, but keep)
-    if tokens[i] in ('negative', 'minus') and i+1 < len(tokens):
-        # parse next token as number then negate
-        sub_num_str, new_i = words_to_number(tokens, i+1)
-        return ('-' + sub_num_str, new_i)
-
-    # units / teens
-    if tokens[i] in NUM_WORDS:
-        num += NUM_WORDS[tokens[i]]
-        consumed += 1
-        got_any = True
-        i2 = i + 1
-        # look ahead for "point" or more tens/units (like "twenty one" would be handled elsewhere)
-        return (str(num), i + consumed)
-
-    # tens like twenty one
-    if tokens[i] in TENS:
-        num += TENS[tokens[i]]
-        consumed += 1
-        got_any = True
-        # possible unit after tens
-        if i+1 < len(tokens) and tokens[i+1] in NUM_WORDS:
-            num += NUM_WORDS[tokens[i+1]]
-            consumed += 1
-        return (str(num), i + consumed)
-
-    # pure digits (like '5' or '12')
-    if re.fullmatch(r'\d+(\.\d+)?', tokens[i]):
-        return (tokens[i], i+1)
-
-    # decimal handling if token is 'point'
-    if tokens[i] == 'point' and i+1 < len(tokens) and re.fullmatch(r'\d+', tokens[i+1]):
-        # ".5" style, but we want "0.5"
-        decimals = []
-        j = i+1
-        while j < len(tokens) and re.fullmatch(r'\d+', tokens[j]):
-            decimals.append(tokens[j])
-            j += 1
-        return ('0.' + ''.join(decimals), j)
-
-    # try to parse number like "one hundred twenty three"
-    # limited support: hundred and thousand
-    if tokens[i] in NUM_WORDS or tokens[i] in TENS:
-        j = i
-        val = 0
-        while j < len(tokens):
-            tok = tokens[j]
-            if tok in NUM_WORDS:
-                val += NUM_WORDS[tok]
-            elif tok in TENS:
-                val += TENS[tok]
-            elif tok == 'hundred':
-                if val == 0:
-                    val = 100
-                else:
-                    val *= 100
-            elif tok == 'thousand':
-                if val == 0:
-                    val = 1000
-                else:
-                    val *= 1000
-            elif tok == 'point':
-                # parse remainder digits as decimals
-                j2 = j+1
-                decimals = []
-                while j2 < len(tokens) and (tokens[j2].isdigit() or tokens[j2] in NUM_WORDS):
-                    if tokens[j2].isdigit():
-                        decimals.append(tokens[j2])
-                    else:
-                        decimals.append(str(NUM_WORDS.get(tokens[j2], '0')))
-                    j2 += 1
-                if decimals:
-                    return (str(val) + '.' + ''.join(decimals), j2)
-                else:
-                    return (str(val), j)
-            else:
-                break
-            j += 1
-        if j > i:
-            return (str(val), j)
-
-    return (None, i)
-
-def text_to_expression(text: str) -> str:
-    """
-    Convert spoken text into a math expression string.
-    Examples:
-      "five plus seven" -> "5+7"
-      "what is twelve divided by three point five" -> "12/3.5"
-    """
-    # normalize
-    t = text.lower()
-    # remove filler words
-    t = t.replace('-', ' ')
-    t = re.sub(r"[^a-z0-9\.\s\%]+", " ", t)  # keep letters, digits, dot, percent
-    t = re.sub(r'\b(what is|calculate|compute|equals|=|answer|please|hey|ok|please)\b', ' ', t)
-    tokens = t.split()
-    out = []
-    i = 0
-    while i < len(tokens):
-        tok = tokens[i]
-        # operator words
-        if tok in OP_MAP:
-            op = OP_MAP[tok]
-            # special case: 'by' often in 'divided by' - if previous token was 'divide' we already added '/'
-            if tok == 'by':
-                # skip if last output was operator
-                if out and out[-1] in '+-*/%':
-                    i += 1
-                    continue
-                else:
-                    # ambiguous - treat as '/'
-                    out.append('/')
-                    i += 1
-                    continue
-            out.append(op)
-            i += 1
-            continue
-
-        # try to parse a number (words or digits)
-        num_str, new_i = words_to_number(tokens, i)
-        if num_str is not None:
-            out.append(num_str)
-            i = new_i
-            continue
-
-        # if token looks like a direct arithmetic operator symbol
-        if re.fullmatch(r'[\+\-\*\/\(\)\%\.]', tok):
-            out.append(tok)
-            i += 1
-            continue
-
-        # token is maybe a digit like '5' or '3.14'
-        if re.fullmatch(r'\d+(\.\d+)?', tok):
-            out.append(tok)
-            i += 1
-            continue
-
-        # ignore unknown filler words
-        i += 1
-
-    # join but ensure spacing between numbers/operators as needed
-    expr = ""
-    for part in out:
-        # avoid things like '5' '10' merging: add operator or space if both numbers in a row -> add '*'? no: add space so safe_eval will reject if required
-        expr += (part if expr == "" else (' ' + part if (re.match(r'^\d', part) and re.match(r'\d$', expr[-1])) else part if part in '+-*/%()' else part))
-    # final cleanup: remove spaces for evaluation, but keep safe chars
-    expr_clean = re.sub(r'\s+', '', expr)
-    return expr_clean
-
-# ---------------------------
-# Speech recognition (tries pocketsphinx offline, else google)
+# Speech recognition (pocketsphinx offline and Google, raced)
 # ---------------------------
 def recognize_speech_from_mic(recognizer, microphone, timeout=6, phrase_time_limit=6):
     """
     Returns a dict: {"success":bool, "error": None or string, "transcription": None or str}
-    Tries pocketsphinx offline first if available, else uses Google (online).
+    Runs pocketsphinx (offline, if installed) and Google (online) at the same time.
     """
+    import speech_recognition as sr
     if not isinstance(recognizer, sr.Recognizer):
         raise ValueError("Recognizer must be sr.Recognizer instance")
     if not isinstance(microphone, sr.Microphone):
         raise ValueError("Microphone must be sr.Microphone instance")
 
-    response = {"success": True, "error": None, "transcription": None}
-
+    try:
+        with metrics.timed("listen"):
+            audio = listen_for_phrase(recognizer, microphone, timeout, phrase_time_limit)
+    except RuntimeError as e:
+        return {"success": False, "error": str(e), "transcription": None}
+    with metrics.timed("recognize"):
+        return recognize_audio(recognizer, audio)
+
+def listen_for_phrase(recognizer, microphone, timeout=6, phrase_time_limit=6):
+    """Record one phrase (sr.AudioData); RuntimeError with a user-facing message on failure."""
+    import speech_recognition as sr
+    from speech_input import calibrate
     try:
         with microphone as source:
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+            calibrate(recognizer, source)   # only if the last calibration is stale
+            return recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
     except sr.WaitTimeoutError:
-        response["success"] = False
-        response["error"] = "Listening timed out while waiting for phrase to start"
-        return response
+        raise RuntimeError("Listening timed out while waiting for phrase to start")
     except Exception as e:
-        response["success"] = False
-        response["error"] = f"Microphone error: {e}"
-        return response
+        raise RuntimeError(f"Microphone error: {e}")
 
-    # try pocketsphinx offline
-    try:
-        transcription = recognizer.recognize_sphinx(audio)
-        response["transcription"] = transcription
-        return response
-    except Exception:
-        # fallback to google online
-        try:
-            transcription = recognizer.recognize_google(audio)
-            response["transcription"] = transcription
-            return response
-        except sr.RequestError:
-            response["success"] = False
-            response["error"] = "API unavailable/unresponsive (Google) and pocketsphinx failed or not installed."
-            return response
-        except sr.UnknownValueError:
-            response["success"] = False
-            response["error"] = "Unable to recognize speech"
-            return response
+def recognize_audio(recognizer, audio, backends=None):
+    """
+    Transcribe recorded audio; returns the same dict as recognize_speech_from_mic.
+    All backends (default: sphinx and Google) run at once and the first
+    transcription that parses as math wins.
+    """
+    from speech_input import default_backends, race
+    return race(audio, backends or default_backends(recognizer), accept=text_to_expression)
 
 # ---------------------------
 # GUI App
 # ---------------------------
+PIPELINE_EVENT = "<<PipelineEvent>>"
+FALLBACK_POLL_MS = 1000     # only matters if a wakeup can't be delivered (Tcl without threads)
+STATS_REFRESH_MS = 1000
+CLOSE_TIMEOUT = 0.5         # seconds on_close waits for the pipeline thread
+
 class VoiceCalculatorApp:
     def __init__(self, root):
         self.root = root
@@ -309,23 +116,54 @@ class VoiceCalculatorApp:
         # status label
         self.status_var = tk.StringVar(value="Ready")
         status_lbl = tk.Label(root, textvariable=self.status_var, font=("Segoe UI", 9), anchor='w', fg='blue')
-        status_lbl.grid(row=7, column=0, columnspan=4, sticky='w', padx=10, pady=(0,8))
-
-        # speech engine
-        self.engine = pyttsx3.init()
-        # queue for thread results
+        status_lbl.grid(row=7, column=0, columnspan=3, sticky='w', padx=10, pady=(0,8))
+
+        # continuous mode: keep the microphone open and take phrase after phrase
+        self.continuous_var = tk.BooleanVar(value=False)
+        keep = tk.Checkbutton(root, text="Keep listening", variable=self.continuous_var,
+                              font=("Segoe UI", 9), command=self.toggle_continuous)
+        keep.grid(row=7, column=3, sticky='e', padx=4, pady=(0,8))
+        self.listener = None
+
+        # Stats menu: per-stage p50/p95 panel (F2) and an opt-in trace
+        self.stats_window = None
+        self.trace_var = tk.BooleanVar(value=metrics.STATS.tracing)
+        menubar = tk.Menu(root)
+        stats_menu = tk.Menu(menubar, tearoff=0)
+        stats_menu.add_command(label="Stage timings", accelerator="F2", command=self.show_stats)
+        stats_menu.add_checkbutton(label="Record trace", variable=self.trace_var, command=self.toggle_trace)
+        stats_menu.add_command(label="Save trace...", command=self.save_trace)
+        menubar.add_cascade(label="Stats", menu=stats_menu)
+        root.config(menu=menubar)
+        root.bind("<F2>", lambda e: self.show_stats())
+
+        # evaluation runs in a child process with a time/memory budget
+        self.evaluator = calc_engine.EvalWorker(timeout=2.0)
+
+        # results from other threads; each put is followed by a PIPELINE_EVENT wakeup
         self.queue = queue.Queue()
 
-        # speech recognizer & mic
-        self.recognizer = sr.Recognizer()
-        try:
-            self.microphone = sr.Microphone()
-        except Exception as e:
-            self.microphone = None
-            messagebox.showwarning("Microphone", f"Microphone not found or accessible: {e}")
-
-        # poll queue periodically
-        self.root.after(200, self.process_queue)
+        # speech output (one worker thread owns the TTS engine), recognizer & mic:
+        # set up by _init_speech once the window is on screen
+        self.speaker = None
+        self.recognizer = None
+        self.microphone = None
+        self.speech_ready = False
+
+        # listen -> recognize -> parse -> evaluate -> speak, off the Tk thread
+        self.pipeline = Pipeline(
+            listen=lambda _: listen_for_phrase(self.recognizer, self.microphone),
+            recognize=lambda audio: recognize_audio(self.recognizer, audio),
+            parse=text_to_expression,
+            evaluate=self.evaluator.evaluate,
+            speak=self.speak_result,
+            on_event=self.post,
+        )
+        self.root.bind(PIPELINE_EVENT, lambda e: self.process_queue(poll=False))
+        self.root.after(FALLBACK_POLL_MS, self.process_queue)
+        self.root.after_idle(self.start_speech_init)
+        self.closing = False
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def style_setup(self):
         self.root.configure(padx=6, pady=6, bg="#f5f5f5")
@@ -339,7 +177,48 @@ class VoiceCalculatorApp:
         else:
             self.display_var.set(cur + char)
 
+    def start_speech_init(self):
+        threading.Thread(target=self._init_speech, name="speech-init", daemon=True).start()
+
+    def _init_speech(self):
+        # heavy imports and device set-up, off the Tk thread
+        with metrics.timed("startup.tts"):
+            speaker = SpeechWorker()
+            speaker.prerender("The result is")
+            self.speaker = speaker
+        if self.closing:
+            speaker.close()     # the window went while the engine was starting
+            return
+        error = None
+        with metrics.timed("startup.microphone"):
+            try:
+                import speech_recognition as sr
+                self.recognizer = sr.Recognizer()
+                self.microphone = sr.Microphone()
+            except ImportError as e:
+                error = f"Speech recognition is not installed: {e}"
+            except Exception as e:
+                error = f"Microphone not found or accessible: {e}"
+        self.post('speech_ready', error)
+
+    def on_close(self):
+        # stop the microphone, the pipeline, the TTS thread and the evaluator process
+        self.closing = True
+        if self.listener:
+            self.listener.stop(wait=False)
+        # not an unbounded join: the pipeline thread may be in post(), whose
+        # event_generate waits for this thread under threaded Tcl
+        self.pipeline.close(timeout=CLOSE_TIMEOUT)
+        if self.speaker:
+            self.speaker.close()
+        self.evaluator.close()
+        self.root.destroy()
+
     def clear(self):
+        # abandon whatever is still being listened to, recognized or evaluated
+        self.pipeline.cancel()
+        if self.speaker:
+            self.speaker.stop()
         self.display_var.set("")
         self.spoken_var.set("")
         self.status_var.set("Cleared")
@@ -349,34 +228,71 @@ class VoiceCalculatorApp:
         expr = expr.replace('×', '*').replace('÷', '/')
         # replace percent operator if present: convert "a%b" -> a % b (python uses %)
         expr = expr.replace('%', '%')
-        try:
-            result = safe_eval(expr)
-            self.display_var.set(str(result))
-            self.status_var.set("Computed")
-            self.speak_text(f"The result is {result}")
-        except Exception as e:
-            self.status_var.set("Error")
-            messagebox.showerror("Error", f"Could not evaluate: {e}")
+        self.start_eval_thread(expr)
+
+    def start_eval_thread(self, expr):
+        # off the Tk thread: a slow or runaway expression must not freeze the window
+        self.pipeline.submit("evaluate", expr)
+        self.status_var.set("Evaluating...")
 
     def start_listen_thread(self):
+        if not self.speech_ready:
+            self.status_var.set("Voice input is still starting...")
+            return
         if not self.microphone:
             messagebox.showerror("Microphone", "Microphone is not available.")
             return
-        # launch recognition in a thread
-        t = threading.Thread(target=self._listen_and_process, daemon=True)
-        t.start()
-        self.status_var.set("Listening... (sphinx if installed, else Google)")
-
-    def _listen_and_process(self):
-        # do recognition (blocking) and put results to queue
-        res = recognize_speech_from_mic(self.recognizer, self.microphone)
-        self.queue.put(('recognized', res))
+        if self.listener and self.listener.running:
+            self.status_var.set("Already listening - just speak")
+            return
+        self.pipeline.submit("listen")
+        self.status_var.set("Listening... (sphinx and Google)")
+
+    def toggle_continuous(self):
+        if not self.continuous_var.get():
+            if self.listener:
+                self.listener.stop(wait=False)
+            self.status_var.set("Stopped listening")
+            return
+        if not self.speech_ready:
+            self.continuous_var.set(False)
+            self.status_var.set("Voice input is still starting...")
+            return
+        if not self.microphone:
+            self.continuous_var.set(False)
+            messagebox.showerror("Microphone", "Microphone is not available.")
+            return
+        if self.listener is None:
+            from speech_input import ContinuousListener
+            self.listener = ContinuousListener(self.recognizer, self.microphone,
+                                               on_phrase=self._on_phrase, on_error=self._on_listen_error)
+        self.listener.start()
+        self.status_var.set("Listening continuously...")
+
+    def _on_phrase(self, audio):
+        # called on the listener thread; blocks only while recognition is backed up
+        self.pipeline.submit("recognize", audio, block=True)
+
+    def _on_listen_error(self, message):
+        self.post('recognized', {"success": False, "error": message, "transcription": None})
+        self.post('listening', False)
+
+    def post(self, tag, payload):
+        """Hand a result to the Tk thread from any thread and wake it up."""
+        if self.closing:
+            return  # the Tk thread may be waiting for ours in on_close
+        self.queue.put((tag, payload, time.perf_counter()))
+        try:
+            self.root.event_generate(PIPELINE_EVENT, when="tail")
+        except (RuntimeError, tk.TclError):
+            pass    # picked up by the fallback poll
 
-    def process_queue(self):
+    def process_queue(self, poll=True):
         try:
             while True:
                 item = self.queue.get_nowait()
-                tag, payload = item
+                tag, payload, posted = item
+                metrics.record("ui", (time.perf_counter() - posted) * 1000, posted)
                 if tag == 'recognized':
                     res = payload
                     if not res['success']:
@@ -387,7 +303,8 @@ class VoiceCalculatorApp:
                     transcription = res.get('transcription', '')
                     self.spoken_var.set("Heard: " + transcription)
                     self.status_var.set("Parsing...")
-                    expr = text_to_expression(transcription)
+                elif tag == 'parsed':
+                    transcription, expr = payload
                     if not expr:
                         self.status_var.set("Could not parse speech to expression")
                         messagebox.showerror("Parse Error", "Couldn't parse the spoken math expression.")
@@ -395,31 +312,86 @@ class VoiceCalculatorApp:
                     # show expression in display
                     self.display_var.set(expr)
                     self.status_var.set("Evaluating...")
-                    try:
-                        result = safe_eval(expr)
-                        self.display_var.set(str(result))
-                        self.status_var.set("Done")
-                        self.speak_text(f"The result is {result}")
-                    except Exception as e:
+                elif tag == 'evaluated':
+                    expr, result, error = payload
+                    if error is not None:
                         self.status_var.set("Evaluation error")
-                        messagebox.showerror("Evaluation Error", f"Could not compute '{expr}': {e}")
-                else:
-                    pass
+                        messagebox.showerror("Evaluation Error", f"Could not compute '{expr}': {error}")
+                        continue
+                    # spoken by the pipeline's speak stage
+                    if isinstance(result, calc_engine.RangeResult):
+                        # keep the ranged expression; the summary goes below it
+                        self.display_var.set(expr)
+                        self.spoken_var.set(f"{result}\n{result.describe_samples()}")
+                    else:
+                        self.display_var.set(str(result))
+                    self.status_var.set("Done")
+                elif tag == 'error':
+                    stage, error = payload
+                    self.status_var.set("Recognition failed" if stage in ("listen", "recognize") else "Error")
+                    messagebox.showerror("Speech Recognition" if stage in ("listen", "recognize") else "Error",
+                                         str(error))
+                elif tag == 'listening':
+                    self.continuous_var.set(payload)
+                elif tag == 'speech_ready':
+                    self.speech_ready = True
+                    if payload:
+                        self.status_var.set("Voice input unavailable")
+                        messagebox.showwarning("Microphone", payload)
         except queue.Empty:
             pass
-        # keep polling
-        self.root.after(200, self.process_queue)
+        if poll:
+            self.root.after(FALLBACK_POLL_MS, self.process_queue)
 
-    def speak_text(self, text):
-        # speak in background thread to avoid blocking
-        def _speak():
-            try:
-                self.engine.say(text)
-                self.engine.runAndWait()
-            except Exception as e:
-                print("TTS error:", e)
-        t = threading.Thread(target=_speak, daemon=True)
-        t.start()
+    def show_stats(self):
+        if self.stats_window is not None:
+            self.stats_window.lift()
+            return
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Stage timings")
+        self.stats_window.protocol("WM_DELETE_WINDOW", self._close_stats)
+        self.stats_var = tk.StringVar()
+        tk.Label(self.stats_window, textvariable=self.stats_var, font=("Consolas", 9),
+                 justify='left', anchor='nw').pack(padx=8, pady=8)
+        self._refresh_stats()
+
+    def _refresh_stats(self):
+        if self.stats_window is None:
+            return
+        self.stats_var.set(metrics.format_table())
+        self.root.after(STATS_REFRESH_MS, self._refresh_stats)
+
+    def _close_stats(self):
+        self.stats_window.destroy()
+        self.stats_window = None
+
+    def toggle_trace(self):
+        if self.trace_var.get():
+            metrics.enable_trace()
+            self.status_var.set("Recording trace")
+        else:
+            metrics.disable_trace()
+            self.status_var.set("Trace discarded")
+
+    def save_trace(self):
+        if not metrics.STATS.tracing:
+            messagebox.showinfo("Trace", "Turn on Stats > Record trace first.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if path:
+            n = metrics.export_trace(path)
+            self.status_var.set(f"Saved {n} trace events")
+
+    def speak_result(self, result):
+        if isinstance(result, calc_engine.RangeResult):
+            self.speak_text("The sum is", calc_engine.format_number(result.sum))
+        else:
+            self.speak_text("The result is", str(result))
+
+    def speak_text(self, *parts):
+        # queued on the speech worker; a newer result interrupts an older one
+        if self.speaker:
+            self.speaker.say(*parts)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,66 @@
+"""
+Opponent strategies against scripted players: win rate and cost per move.
+
+    python bench_strategies.py
+    python bench_strategies.py --rounds 1000000 --seed 3
+
+Every computer strategy plays --rounds rounds against every scripted
+player (stand-ins for a human's habits). For each pair it prints the
+computer's win/draw/loss rates and the time per move, i.e. one choose()
+plus one observe() of the computer; the latter stays flat as the number
+of rounds grows when prediction and update are constant-time.
+"""
+import argparse
+import time
+
+from rps_engine import LOSE, PAYOFF, WIN
+from rps_strategies import OPPONENTS, SCRIPTED
+
+def match(computer, player, rounds):
+    """(computer wins, draws, losses, seconds spent in the computer)."""
+    wins = draws = losses = 0
+    spent = 0.0
+    clock = time.perf_counter
+    for _ in range(rounds):
+        start = clock()
+        c = computer.choose()
+        spent += clock() - start
+        p = player.choose()
+        start = clock()
+        computer.observe(c, p)
+        spent += clock() - start
+        player.observe(p, c)
+        result = PAYOFF[c][p]
+        if result == WIN:
+            wins += 1
+        elif result == LOSE:
+            losses += 1
+        else:
+            draws += 1
+    return wins, draws, losses, spent
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'computer':<11}{'player':<21}{'win':>7}{'draw':>7}{'loss':>7}{'us/move':>10}")
+    for cname, cfactory in OPPONENTS.items():
+        for pname, pfactory in SCRIPTED.items():
+            wins, draws, losses, spent = match(cfactory(args.seed), pfactory(args.seed + 1), args.rounds)
+            n = args.rounds
+            print(f"{cname:<11}{pname:<21}{wins / n:>7.1%}{draws / n:>7.1%}{losses / n:>7.1%}"
+                  f"{spent / n * 1e6:>10.2f}")
+
+    # cost per move at growing history lengths (should not grow)
+    computer, player = OPPONENTS["markov"](args.seed), SCRIPTED["biased"](args.seed)
+    print()
+    done = 0
+    for total in (10_000, 100_000, 1_000_000):
+        _, _, _, spent = match(computer, player, total - done)
+        print(f"markov after {total:>9,} rounds: {spent / (total - done) * 1e6:.2f} us/move")
+        done = total
+
+if __name__ == "__main__":
+    main()
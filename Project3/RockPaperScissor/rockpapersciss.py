@@ -1,5 +1,9 @@
+import os
 import tkinter as tk
-import random
+
+from rps_engine import Game, LOSE, MOVE_INDEX, MOVES, WIN
+from rps_history import HistoryLog, describe
+from rps_strategies import OPPONENTS, make
 
 # -----------------------------
 # Main Window
@@ -11,45 +15,43 @@ root.config(bg="#121212")  # Dark gaming background
 root.resizable(False, False)  # Fixed size window
 
 # -----------------------------
-# Scores
+# Scores (kept by the engine)
 # -----------------------------
-user_score = 0
-computer_score = 0
+# the computer learns from your moves unless "random" is picked below
+game = Game(strategy=make("markov"))
+
+# every round ever played, one byte each; survives Reset and restarts
+# (RPS_HISTORY points it elsewhere, e.g. for benchmarks)
+HISTORY_PATH = os.environ.get("RPS_HISTORY") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "rps_history.bin")
+history = HistoryLog(HISTORY_PATH)
 
 # -----------------------------
 # Functions
 # -----------------------------
-def computer_choice():
-    return random.choice(["Rock", "Paper", "Scissors"])
-
 def play(user_choice):
-    global user_score, computer_score
-
-    comp_choice = computer_choice()
-    result_text = ""
+    rnd = game.play(MOVE_INDEX[user_choice])
+    history.append(rnd)
 
-    if user_choice == comp_choice:
-        result_text = "Draw!"
-        color = "#FFD700"  # Gold
-    elif (user_choice == "Rock" and comp_choice == "Scissors") or \
-         (user_choice == "Paper" and comp_choice == "Rock") or \
-         (user_choice == "Scissors" and comp_choice == "Paper"):
+    if rnd.outcome == WIN:
         result_text = "You Win!"
         color = "#00FF00"  # Neon Green
-        user_score += 1
-    else:
+    elif rnd.outcome == LOSE:
         result_text = "You Lose!"
         color = "#FF0000"  # Neon Red
-        computer_score += 1
+    else:
+        result_text = "Draw!"
+        color = "#FFD700"  # Gold
 
-    lbl_result.config(text=f"{result_text}\nYou: {user_choice} | Computer: {comp_choice}", fg=color)
-    lbl_user_score.config(text=f"Your Score: {user_score}")
-    lbl_comp_score.config(text=f"Computer Score: {computer_score}")
+    lbl_result.config(text=f"{result_text}\nYou: {user_choice} | Computer: {MOVES[rnd.computer]}", fg=color)
+    lbl_user_score.config(text=f"Your Score: {game.user_score}")
+    lbl_comp_score.config(text=f"Computer Score: {game.computer_score}")
+    lbl_lifetime.config(text=describe(history.stats))
+
+def set_opponent(name):
+    game.strategy = make(name)
 
 def reset_game():
-    global user_score, computer_score
-    user_score = 0
-    computer_score = 0
+    game.reset()
     lbl_result.config(text="Make your move!", fg="#FFFFFF")
     lbl_user_score.config(text="Your Score: 0")
     lbl_comp_score.config(text="Computer Score: 0")
@@ -93,6 +95,21 @@ lbl_user_score.pack(pady=5)
 lbl_comp_score = tk.Label(root, text="Computer Score: 0", font=("Arial", 12, "bold"), bg="#121212", fg="#FF0000")
 lbl_comp_score.pack(pady=5)
 
+lbl_lifetime = tk.Label(root, text=describe(history.stats), font=("Arial", 9), bg="#121212", fg="#AAAAAA")
+lbl_lifetime.pack(pady=2)
+
+# -----------------------------
+# Opponent
+# -----------------------------
+frame_opponent = tk.Frame(root, bg="#121212")
+frame_opponent.pack(pady=5)
+
+tk.Label(frame_opponent, text="Computer plays:", font=("Arial", 11, "bold"), bg="#121212", fg="#FFFFFF").grid(row=0, column=0, padx=5)
+opponent_var = tk.StringVar(value="markov")
+opt_opponent = tk.OptionMenu(frame_opponent, opponent_var, *OPPONENTS, command=set_opponent)
+opt_opponent.config(font=("Arial", 11), bg="#333333", fg="#FFFFFF", activebackground="#555555", highlightthickness=0)
+opt_opponent.grid(row=0, column=1, padx=5)
+
 # -----------------------------
 # Reset & Exit Buttons
 # -----------------------------
@@ -111,3 +128,4 @@ btn_exit.grid(row=0, column=1, padx=10)
 # Run the app
 # -----------------------------
 root.mainloop()
+history.close()
@@ -0,0 +1,139 @@
+"""
+Rock-paper-scissors rules and simulation, without any Tk.
+
+    from rps_engine import Game, ROCK, WIN
+    game = Game(seed=1)            # or Game(strategy=rps_strategies.make("markov"))
+    rnd = game.play(ROCK)          # Round(user=0, computer=2, outcome=1)
+    rnd.outcome == WIN, game.user_score
+
+    simulate(10_000_000, seed=1)   # Tally(rounds=10000000, wins=..., losses=..., draws=...)
+
+Moves are small integers (ROCK, PAPER, SCISSORS = 0, 1, 2) and the
+outcome of a round, from the user's side, is looked up in the 3x3 PAYOFF
+table instead of being worked out by comparing names. simulate() plays
+whole batches of rounds at once with NumPy (imported on first use):
+random moves are drawn for both sides and the outcomes are read from the
+same table by fancy indexing. Every source of randomness takes a seed, so
+runs can be reproduced.
+
+    python rps_engine.py --rounds 10000000 --seed 1
+"""
+import argparse
+import random
+import time
+from collections import namedtuple
+
+ROCK, PAPER, SCISSORS = 0, 1, 2
+MOVES = ("Rock", "Paper", "Scissors")
+MOVE_INDEX = {name: i for i, name in enumerate(MOVES)}
+
+DRAW, WIN, LOSE = 0, 1, 2       # outcome for the user
+OUTCOMES = ("Draw", "Win", "Lose")
+
+# PAYOFF[user][computer]; each move beats the one before it (paper > rock)
+PAYOFF = (
+    (DRAW, LOSE, WIN),      # rock vs rock, paper, scissors
+    (WIN, DRAW, LOSE),      # paper
+    (LOSE, WIN, DRAW),      # scissors
+)
+
+Round = namedtuple("Round", "user computer outcome")
+Tally = namedtuple("Tally", "rounds wins losses draws")
+
+def outcome(user, computer):
+    """DRAW, WIN or LOSE for the user."""
+    return PAYOFF[user][computer]
+
+def beats(move):
+    """The move that beats move."""
+    return (move + 1) % 3
+
+class Game:
+    """
+    Scores of one player against the computer. The computer's moves come
+    from `strategy` (see rps_strategies), or are random without one.
+    """
+
+    def __init__(self, seed=None, strategy=None):
+        self.rng = random.Random(seed)
+        self.strategy = strategy
+        self.reset()
+
+    def reset(self):
+        self.user_score = 0
+        self.computer_score = 0
+        self.draws = 0
+
+    @property
+    def rounds(self):
+        return self.user_score + self.computer_score + self.draws
+
+    def computer_choice(self):
+        if self.strategy is not None:
+            return self.strategy.choose()
+        return self.rng.randrange(3)
+
+    def play(self, user):
+        """Play one round with the user's move (an int); returns the Round."""
+        computer = self.computer_choice()
+        if self.strategy is not None:
+            self.strategy.observe(computer, user)
+        result = PAYOFF[user][computer]
+        if result == WIN:
+            self.user_score += 1
+        elif result == LOSE:
+            self.computer_score += 1
+        else:
+            self.draws += 1
+        return Round(user, computer, result)
+
+# ---------------------------
+# Vectorized simulation (NumPy)
+# ---------------------------
+BATCH = 1 << 22     # rounds generated at once; bounds memory use (about 12 MB per batch)
+
+def payoff_array():
+    import numpy as np
+    return np.array(PAYOFF, dtype=np.int8)
+
+def resolve(user, computer):
+    """Outcomes for arrays of moves (NumPy int arrays of the same shape)."""
+    return payoff_array()[user, computer]
+
+def simulate(rounds, seed=None, user_probs=None, computer_probs=None, batch=BATCH):
+    """
+    Play `rounds` random rounds; moves are drawn uniformly, or with the
+    given probabilities for (rock, paper, scissors). Returns a Tally.
+    """
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    table = payoff_array()
+    counts = np.zeros(3, dtype=np.int64)
+    done = 0
+    while done < rounds:
+        n = min(batch, rounds - done)
+        user = _moves(rng, n, user_probs)
+        computer = _moves(rng, n, computer_probs)
+        counts += np.bincount(table[user, computer], minlength=3)
+        done += n
+    return Tally(rounds, int(counts[WIN]), int(counts[LOSE]), int(counts[DRAW]))
+
+def _moves(rng, n, probs):
+    import numpy as np
+    if probs is None:
+        return rng.integers(0, 3, size=n, dtype=np.int8)
+    return rng.choice(3, size=n, p=probs).astype(np.int8)
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate random rock-paper-scissors rounds.")
+    parser.add_argument("--rounds", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    tally = simulate(args.rounds, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{tally.rounds:,} rounds: {tally.wins:,} wins, {tally.losses:,} losses, {tally.draws:,} draws")
+    print(f"{elapsed:.3f} s ({tally.rounds / elapsed:,.0f} rounds/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Lifetime match history: one byte per round in a binary log, plus
+incrementally maintained statistics.
+
+    history = HistoryLog("rps_history.bin")
+    history.append(rnd)             # an rps_engine.Round
+    history.stats.win_rate(), history.stats.longest[WIN]
+    history.read(-10)               # the last ten rounds, as Rounds
+    history.close()                 # also saves the stats snapshot
+
+Each round is packed into a byte: user move in bits 0-1, computer move
+in bits 2-3, outcome in bits 4-5 (bits 6-7 are reserved), after an 8-byte
+header. Ten million rounds take 10 MB. Reads go through mmap, so looking
+at any part of the log does not load the rest.
+
+Stats are updated in O(1) per round:
+- counts per user move and outcome;
+- the current streak and the longest winning and losing streaks;
+- a rolling window of the last WINDOW outcomes.
+They are saved next to the log (<log>.stats.json) together with the
+number of rounds they cover. On opening, only the rounds after that point
+are replayed. A missing or stale snapshot is rebuilt from the whole log,
+vectorized with NumPy when it is installed.
+"""
+import json
+import mmap
+import os
+from collections import deque
+
+from rps_engine import DRAW, LOSE, MOVES, WIN, Round
+
+MAGIC = b"RPSLOG1\n"
+WINDOW = 100
+SNAPSHOT_EVERY = 500    # rounds between stats snapshots while playing
+
+def pack(user, computer, outcome):
+    return user | computer << 2 | outcome << 4
+
+def unpack(byte):
+    return Round(byte & 3, byte >> 2 & 3, byte >> 4 & 3)
+
+class Stats:
+    """Aggregates over a sequence of rounds, updated one round at a time."""
+
+    def __init__(self, window=WINDOW):
+        self.rounds = 0
+        self.by_move = [[0, 0, 0] for _ in range(3)]    # [user move][outcome] -> rounds
+        self.streak = (None, 0)                         # (outcome, length) of the current run
+        self.longest = [0, 0, 0]                        # longest run of each outcome
+        self.recent = deque(maxlen=window)              # last `window` outcomes
+        self.recent_counts = [0, 0, 0]
+
+    def add(self, user, outcome):
+        self.rounds += 1
+        self.by_move[user][outcome] += 1
+        kind, length = self.streak
+        length = length + 1 if kind == outcome else 1
+        self.streak = (outcome, length)
+        if length > self.longest[outcome]:
+            self.longest[outcome] = length
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_counts[self.recent[0]] -= 1
+        self.recent.append(outcome)
+        self.recent_counts[outcome] += 1
+
+    def totals(self):
+        """[draws, wins, losses] over all rounds."""
+        return [sum(row[k] for row in self.by_move) for k in range(3)]
+
+    def win_rate(self, move=None):
+        """Share of rounds won, overall or when the user played move."""
+        row = self.totals() if move is None else self.by_move[move]
+        n = sum(row)
+        return row[WIN] / n if n else 0.0
+
+    def recent_win_rate(self):
+        return self.recent_counts[WIN] / len(self.recent) if self.recent else 0.0
+
+    def to_dict(self):
+        return {"rounds": self.rounds, "by_move": self.by_move, "streak": list(self.streak),
+                "longest": self.longest, "recent": list(self.recent)}
+
+    @classmethod
+    def from_dict(cls, d, window=WINDOW):
+        stats = cls(window)
+        stats.rounds = d["rounds"]
+        stats.by_move = d["by_move"]
+        stats.streak = tuple(d["streak"])
+        stats.longest = d["longest"]
+        for outcome in d["recent"][-window:]:
+            stats.recent.append(outcome)
+            stats.recent_counts[outcome] += 1
+        return stats
+
+    @classmethod
+    def from_bytes(cls, data, window=WINDOW):
+        """Stats for packed rounds (bytes, mmap or memoryview), vectorized when NumPy is available."""
+        try:
+            import numpy as np
+        except ImportError:
+            stats = cls(window)
+            for byte in data:
+                stats.add(byte & 3, byte >> 4 & 3)
+            return stats
+        stats = cls(window)
+        packed = np.frombuffer(data, dtype=np.uint8)
+        if not len(packed):
+            return stats
+        user = packed & 3
+        outcome = packed >> 4 & 3
+        stats.rounds = len(packed)
+        stats.by_move = np.bincount(user * 3 + outcome, minlength=9).reshape(3, 3).tolist()
+        # runs of equal outcomes: where they start, how long they are, which outcome
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(outcome)) + 1))
+        lengths = np.diff(np.append(starts, len(outcome)))
+        kinds = outcome[starts]
+        stats.longest = [int(lengths[kinds == k].max(initial=0)) for k in range(3)]
+        stats.streak = (int(kinds[-1]), int(lengths[-1]))
+        for o in outcome[-window:].tolist():
+            stats.recent.append(o)
+            stats.recent_counts[o] += 1
+        return stats
+
+class HistoryLog:
+
+    def __init__(self, path, window=WINDOW):
+        self.path = path
+        self.stats_path = path + ".stats.json"
+        self.window = window
+        if not os.path.exists(path) or os.path.getsize(path) < len(MAGIC):
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+        self.file = open(path, "r+b")
+        if self.file.read(len(MAGIC)) != MAGIC:
+            self.file.close()
+            raise ValueError(f"{path} is not a rock-paper-scissors history log")
+        self.file.seek(0, os.SEEK_END)
+        self.map = None
+        self.mapped = 0         # rounds covered by self.map
+        self.stats = self._load_stats()
+        self.unsaved = 0
+
+    def __len__(self):
+        return self.stats.rounds
+
+    # --- writing ---
+
+    def append(self, rnd):
+        """Record one Round and update the stats."""
+        self.file.write(bytes((pack(rnd.user, rnd.computer, rnd.outcome),)))
+        self.file.flush()
+        self.stats.add(rnd.user, rnd.outcome)
+        self.unsaved += 1
+        if self.unsaved >= SNAPSHOT_EVERY:
+            self.save_stats()
+
+    def save_stats(self):
+        tmp = self.stats_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.stats.to_dict(), f)
+        os.replace(tmp, self.stats_path)
+        self.unsaved = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.save_stats()
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+    # --- reading ---
+
+    def read(self, start=0, stop=None):
+        """Rounds start..stop (list indices, negative from the end) as a list of Rounds."""
+        return [unpack(b) for b in self.raw(start, stop)]
+
+    def raw(self, start=0, stop=None):
+        """Packed rounds start..stop as bytes, copied from the mapped log."""
+        start, stop, _ = slice(start, stop).indices(self.stats.rounds)
+        if start >= stop:
+            return b""
+        self._remap()
+        return self.map[len(MAGIC) + start:len(MAGIC) + stop]
+
+    def _remap(self):
+        rounds = self._rounds_on_disk()
+        if self.map is None or self.mapped != rounds:
+            if self.map is not None:
+                self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped = rounds
+
+    def _rounds_on_disk(self):
+        return os.fstat(self.file.fileno()).st_size - len(MAGIC)
+
+    def _load_stats(self):
+        rounds = self._rounds_on_disk()
+        stats = None
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                stats = Stats.from_dict(json.load(f), self.window)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        if stats is not None and stats.rounds > rounds:
+            stats = None    # the log was replaced or truncated
+        if not rounds:
+            return stats or Stats(self.window)
+        self._remap()
+        data = memoryview(self.map)[len(MAGIC):]
+        try:
+            if stats is None:
+                return Stats.from_bytes(data, self.window)
+            for byte in data[stats.rounds:]:
+                stats.add(byte & 3, byte >> 4 & 3)
+            return stats
+        finally:
+            data.release()
+
+def describe(stats):
+    """One-line lifetime summary for the GUI."""
+    if not stats.rounds:
+        return "Lifetime: no rounds yet"
+    kind, length = stats.streak
+    streak = {WIN: "won", LOSE: "lost", DRAW: "drawn"}[kind]
+    per_move = " | ".join(f"{name} {stats.win_rate(m):.0%}" for m, name in enumerate(MOVES))
+    return (f"Lifetime: {stats.rounds:,} rounds, {stats.win_rate():.0%} won "
+            f"(last {len(stats.recent)}: {stats.recent_win_rate():.0%})\n"
+            f"Won with {per_move}\n"
+            f"Best streak {stats.longest[WIN]} | {length} {streak} in a row")
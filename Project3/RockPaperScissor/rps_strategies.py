@@ -0,0 +1,212 @@
+"""
+Opponent strategies for rock-paper-scissors.
+
+    from rps_strategies import make
+    bot = make("markov", seed=1)
+    move = bot.choose()             # 0, 1 or 2 (rps_engine.ROCK, PAPER, SCISSORS)
+    bot.observe(move, their_move)   # after every round
+
+A strategy plays one side: choose() returns its next move and observe()
+is told its own move and the opponent's once the round is over, so the
+same classes serve as the computer in the GUI, as scripted stand-ins for
+a human, and as entrants in a tournament.
+
+MarkovStrategy predicts the opponent from what followed their last 1..order
+moves. The counts live in fixed-size arrays (3**k contexts x 3 moves for
+each order k), so each observe() and choose() costs the same on the first
+round and the millionth, and memory never grows. Counts decay: a context's
+row is scaled by `decay` whenever it is updated, so a player who changes
+habits is picked up within a few rounds.
+"""
+import random
+
+from rps_engine import PAPER, ROCK, SCISSORS, beats
+
+class Strategy:
+    name = "strategy"
+
+    def choose(self):
+        raise NotImplementedError
+
+    def observe(self, own, opponent):
+        pass
+
+# ---------------------------
+# Computer opponents
+# ---------------------------
+class RandomStrategy(Strategy):
+    """Uniformly random: unbeatable in the long run, but never exploits anyone."""
+    name = "random"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self):
+        return self.rng.randrange(3)
+
+class FrequencyStrategy(Strategy):
+    """Beats the opponent's most frequent move (decayed counts)."""
+    name = "frequency"
+
+    def __init__(self, seed=None, decay=0.98):
+        self.rng = random.Random(seed)
+        self.decay = decay
+        self.counts = [0.0, 0.0, 0.0]
+
+    def choose(self):
+        return beats(_argmax(self.counts, self.rng))
+
+    def observe(self, own, opponent):
+        counts = self.counts
+        d = self.decay
+        counts[0] *= d
+        counts[1] *= d
+        counts[2] *= d
+        counts[opponent] += 1.0
+
+class MarkovStrategy(Strategy):
+    """
+    Variable-order n-gram predictor of the opponent's next move. The
+    longest context (up to `order` moves) with at least `min_evidence`
+    decayed observations makes the prediction; shorter ones are the
+    fallback, and with no evidence at all it plays randomly.
+    """
+    name = "markov"
+
+    def __init__(self, seed=None, order=3, decay=0.9, min_evidence=1.0):
+        self.rng = random.Random(seed)
+        self.order = order
+        self.decay = decay
+        self.min_evidence = min_evidence
+        # tables[k][context * 3 + move]: decayed count of `move` after the last k moves
+        self.tables = [[0.0] * (3 ** k * 3) for k in range(order + 1)]
+        self.totals = [[0.0] * (3 ** k) for k in range(order + 1)]
+        self.sizes = [3 ** k for k in range(order + 1)]
+        self.history = 0        # last `order` opponent moves, base 3, newest lowest
+        self.seen = 0           # moves seen, capped at order
+
+    def predict(self):
+        """Most likely next opponent move, or None without evidence."""
+        for k in range(self.seen, -1, -1):
+            context = self.history % self.sizes[k]
+            if self.totals[k][context] >= self.min_evidence:
+                row = self.tables[k]
+                base = context * 3
+                return _argmax(row[base:base + 3], self.rng)
+        return None
+
+    def choose(self):
+        predicted = self.predict()
+        return self.rng.randrange(3) if predicted is None else beats(predicted)
+
+    def observe(self, own, opponent):
+        d = self.decay
+        for k in range(self.seen + 1):
+            context = self.history % self.sizes[k]
+            row = self.tables[k]
+            base = context * 3
+            row[base] *= d
+            row[base + 1] *= d
+            row[base + 2] *= d
+            row[base + opponent] += 1.0
+            totals = self.totals[k]
+            totals[context] = totals[context] * d + 1.0
+        self.history = (self.history * 3 + opponent) % self.sizes[self.order]
+        if self.seen < self.order:
+            self.seen += 1
+
+def _argmax(values, rng):
+    best = max(values)
+    ties = [i for i, v in enumerate(values) if v == best]
+    return ties[0] if len(ties) == 1 else rng.choice(ties)
+
+# ---------------------------
+# Scripted players (stand-ins for a human)
+# ---------------------------
+class ConstantPlayer(Strategy):
+    """Always the same move."""
+
+    def __init__(self, seed=None, move=ROCK):
+        self.move = move
+        self.name = ("rock", "paper", "scissors")[move]
+
+    def choose(self):
+        return self.move
+
+class CyclePlayer(Strategy):
+    """Repeats a fixed pattern of moves."""
+    name = "cycle"
+
+    def __init__(self, seed=None, pattern=(ROCK, ROCK, PAPER, SCISSORS)):
+        self.pattern = pattern
+        self.i = 0
+
+    def choose(self):
+        move = self.pattern[self.i]
+        self.i = (self.i + 1) % len(self.pattern)
+        return move
+
+class BiasedPlayer(Strategy):
+    """Random, but favours rock (as people are said to)."""
+    name = "biased"
+
+    def __init__(self, seed=None, weights=(0.5, 0.3, 0.2)):
+        self.rng = random.Random(seed)
+        self.weights = weights
+
+    def choose(self):
+        return self.rng.choices((ROCK, PAPER, SCISSORS), self.weights)[0]
+
+class WinStayLoseShift(Strategy):
+    """Keeps a winning move, switches to what would have beaten the opponent after losing."""
+    name = "win-stay-lose-shift"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.next = None
+
+    def choose(self):
+        return self.rng.randrange(3) if self.next is None else self.next
+
+    def observe(self, own, opponent):
+        lost = beats(own) == opponent
+        self.next = beats(opponent) if lost else own
+
+class BeatLastPlayer(Strategy):
+    """Plays whatever beats the opponent's previous move."""
+    name = "beat-last"
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.last = None
+
+    def choose(self):
+        return self.rng.randrange(3) if self.last is None else beats(self.last)
+
+    def observe(self, own, opponent):
+        self.last = opponent
+
+def _constant(move):
+    return lambda seed=None: ConstantPlayer(seed, move)
+
+# name -> factory(seed)
+OPPONENTS = {
+    "random": RandomStrategy,
+    "frequency": FrequencyStrategy,
+    "markov": MarkovStrategy,
+}
+SCRIPTED = {
+    "rock": _constant(ROCK),
+    "cycle": CyclePlayer,
+    "biased": BiasedPlayer,
+    "win-stay-lose-shift": WinStayLoseShift,
+    "beat-last": BeatLastPlayer,
+}
+STRATEGIES = {**OPPONENTS, **SCRIPTED}
+
+def make(name, seed=None):
+    try:
+        factory = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}; choose from {', '.join(STRATEGIES)}") from None
+    return factory(seed)
@@ -0,0 +1,197 @@
+"""
+Round-robin tournament between rock-paper-scissors strategies.
+
+    python rps_tournament.py
+    python rps_tournament.py --rounds 1000 --repeats 50 --jobs 4
+    python rps_tournament.py markov frequency random cycle --scaling
+
+Every pair of entrants (rps_strategies names; default: all of them)
+plays --repeats matches of --rounds rounds. Each match gets its own
+seed, derived from --seed, the two names and the repeat number, so the
+results do not depend on which process ran it or in what order.
+
+Matches are grouped into chunks and played in a process pool. Each
+worker adds up the win/draw/loss counts of its chunk, and the main process
+folds the chunk totals into the matrices as they arrive. Nothing per match
+is kept, so memory does not grow with the number of matches.
+
+--scaling runs the same tournament with 1, 2, 4, ... processes up to
+--jobs and reports matches per second and the parallel efficiency
+(speed-up divided by the process count). Each pool is started and warmed
+up before the clock starts, so process start-up is not counted.
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from rps_engine import LOSE, PAYOFF, WIN
+from rps_strategies import STRATEGIES, make
+
+def match_seed(seed, a, b, number):
+    return zlib.crc32(f"{seed}/{a}/{b}/{number}".encode())
+
+def play_match(a, b, rounds):
+    """(wins, draws, losses) of strategy a against strategy b."""
+    wins = draws = losses = 0
+    for _ in range(rounds):
+        x = a.choose()
+        y = b.choose()
+        a.observe(x, y)
+        b.observe(y, x)
+        result = PAYOFF[x][y]
+        if result == WIN:
+            wins += 1
+        elif result == LOSE:
+            losses += 1
+        else:
+            draws += 1
+    return wins, draws, losses
+
+def run_chunk(tasks, rounds):
+    """Play (i, j, name_i, name_j, seed) matches; {(i, j): [wins, draws, losses]} for i's side."""
+    totals = {}
+    for i, j, a, b, seed in tasks:
+        result = play_match(make(a, seed), make(b, seed + 1), rounds)
+        t = totals.setdefault((i, j), [0, 0, 0])
+        for k in range(3):
+            t[k] += result[k]
+    return totals
+
+def schedule(names, repeats, seed):
+    """Every match of the round robin, in a fixed order."""
+    for i, a in enumerate(names):
+        for j in range(i + 1, len(names)):
+            b = names[j]
+            for r in range(repeats):
+                yield i, j, a, b, match_seed(seed, a, b, r)
+
+def chunks(tasks, size):
+    chunk = []
+    for task in tasks:
+        chunk.append(task)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run(names, rounds=200, repeats=20, seed=0, jobs=None, chunk_size=None, pool=None):
+    """
+    Play the tournament. Returns (results, matches, seconds), where
+    results[i][j] = [wins, draws, losses] of names[i] against names[j].
+    With jobs > 1 the matches go to `pool` if given (a ProcessPoolExecutor
+    with `jobs` workers), otherwise to a pool started and stopped here.
+    """
+    n = len(names)
+    results = [[[0, 0, 0] for _ in range(n)] for _ in range(n)]
+    matches = n * (n - 1) // 2 * repeats
+    jobs = jobs or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, matches // (8 * jobs))
+
+    def fold(totals):
+        for (i, j), (w, d, l) in totals.items():
+            results[i][j][0] += w
+            results[i][j][1] += d
+            results[i][j][2] += l
+            results[j][i][0] += l
+            results[j][i][1] += d
+            results[j][i][2] += w
+
+    start = time.perf_counter()
+    tasks = chunks(schedule(names, repeats, seed), chunk_size)
+    if jobs == 1:
+        for chunk in tasks:
+            fold(run_chunk(chunk, rounds))
+    elif pool is not None:
+        for totals in pool.map(run_chunk, tasks, repeat(rounds)):
+            fold(totals)
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            for totals in pool.map(run_chunk, tasks, repeat(rounds)):
+                fold(totals)
+    return results, matches, time.perf_counter() - start
+
+def _idle(seconds):
+    time.sleep(seconds)
+
+def warm_up(pool, jobs):
+    """Make sure all `jobs` worker processes are running before anything is timed."""
+    list(pool.map(_idle, [0.05] * (2 * jobs)))
+
+def report(names, results):
+    width = max(len(n) for n in names) + 2
+    print("win rate of row against column")
+    print(" " * width + "".join(f"{n[:9]:>10}" for n in names))
+    for i, a in enumerate(names):
+        cells = []
+        for j in range(len(names)):
+            w, d, l = results[i][j]
+            cells.append(f"{w / (w + d + l):>10.1%}" if i != j else f"{'-':>10}")
+        print(f"{a:<{width}}" + "".join(cells))
+    print()
+    print("standings (win = 1 point, draw = 1/2)")
+    scores = []
+    for i, a in enumerate(names):
+        w = sum(r[0] for r in results[i])
+        d = sum(r[1] for r in results[i])
+        l = sum(r[2] for r in results[i])
+        scores.append(((w + d / 2) / max(1, w + d + l), a, w, d, l))
+    for score, a, w, d, l in sorted(scores, reverse=True):
+        print(f"  {a:<{width}}{score:7.1%}   {w:,} W  {d:,} D  {l:,} L")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help=f"strategies (default: all of {', '.join(STRATEGIES)})")
+    parser.add_argument("--rounds", type=int, default=200, help="rounds per match")
+    parser.add_argument("--repeats", type=int, default=20, help="matches per pair")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes (1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, help="matches per task (default: about 8 tasks per worker)")
+    parser.add_argument("--scaling", action="store_true", help="time 1, 2, 4, ... --jobs processes")
+    args = parser.parse_args()
+    names = args.names or list(STRATEGIES)
+    for name in names:
+        if name not in STRATEGIES:
+            parser.error(f"unknown strategy {name!r}")
+    if len(set(names)) < 2:
+        parser.error("need at least two different strategies")
+    for option in ("rounds", "repeats", "jobs"):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option} must be at least 1")
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    if not args.scaling:
+        results, matches, elapsed = run(names, args.rounds, args.repeats, args.seed, args.jobs, args.chunk_size)
+        report(names, results)
+        print(f"\n{matches:,} matches x {args.rounds} rounds in {elapsed:.2f} s "
+              f"({matches / elapsed:,.0f} matches/s, {args.jobs} process{'es' if args.jobs > 1 else ''})")
+        return 0
+
+    counts = sorted({1 << k for k in range(args.jobs.bit_length()) if 1 << k <= args.jobs} | {args.jobs})
+    base_rate = first = None
+    print(f"{'processes':>9}{'matches/s':>12}{'speed-up':>10}{'efficiency':>12}")
+    for jobs in counts:
+        if jobs == 1:
+            results, matches, elapsed = run(names, args.rounds, args.repeats, args.seed, 1, args.chunk_size)
+        else:
+            with ProcessPoolExecutor(jobs) as pool:
+                warm_up(pool, jobs)
+                results, matches, elapsed = run(names, args.rounds, args.repeats, args.seed, jobs,
+                                                args.chunk_size, pool)
+        rate = matches / elapsed
+        base_rate = base_rate or rate
+        print(f"{jobs:>9}{rate:>12,.0f}{rate / base_rate:>10.2f}{rate / base_rate / jobs:>12.0%}")
+        if first is None:
+            first = results
+        elif results != first:
+            print("results differ from the 1-process run", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""
+Import the three Tk apps without a window.
+
+    import headless
+    headless.install("fake", answers={"askdirectory": "/tmp/tasks"})
+    todolist = headless.load_app("Project1/TODOlist", "todolist")
+    todolist.refresh()
+
+All three apps build their window when the module runs (todolist.py and
+rockpapersciss.py at import time, voice_calculator.py when constructed)
+and end in root.mainloop(). install() makes that harmless:
+
+- "fake" puts a stand-in tkinter package in sys.modules. Widgets accept
+  every option and method; Listbox and Entry keep their contents and
+  Label and StringVar their values, so the apps' own code runs the same
+  way, minus the Tcl calls. Needs no display.
+- "real" keeps the real tkinter (run under a virtual display, e.g.
+  xvfb-run) and only patches out mainloop() and the dialogs, so widget
+  costs are included.
+
+Dialogs return the value in `answers` under their function name (or
+None; askyesno returns True).
+"""
+import importlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ANSWERS = {"askyesno": True}
+DIALOGS = {
+    "messagebox": ("showinfo", "showwarning", "showerror", "askyesno", "askokcancel"),
+    "filedialog": ("askdirectory", "askopenfilename", "asksaveasfilename"),
+    "simpledialog": ("askstring", "askinteger", "askfloat"),
+}
+
+def _dialog(name):
+    def ask(*args, **kwargs):
+        return ANSWERS.get(name)
+    ask.__name__ = name
+    return ask
+
+# ---------------------------
+# Stand-in tkinter
+# ---------------------------
+END = "end"
+SINGLE, BROWSE, MULTIPLE, EXTENDED = "single", "browse", "multiple", "extended"
+LEFT, RIGHT, TOP, BOTTOM, BOTH, X, Y = "left", "right", "top", "bottom", "both", "x", "y"
+FLAT, RAISED, SUNKEN, GROOVE, RIDGE = "flat", "raised", "sunken", "groove", "ridge"
+NORMAL, DISABLED = "normal", "disabled"
+
+class TclError(Exception):
+    pass
+
+class Widget:
+    """Accepts any option and any method call; config() is remembered."""
+
+    def __init__(self, master=None, *args, **options):
+        self.master = master
+        self.options = dict(options)
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _nothing
+
+def _nothing(*args, **kwargs):
+    return None
+
+class Tk(Widget):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(None)
+        self.pending = 0
+
+    def after(self, ms, func=None, *args):
+        # never run: there is no event loop, the benchmarks call the apps directly
+        self.pending += 1
+        return f"after#{self.pending}"
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+class Toplevel(Tk):
+    pass
+
+class Entry(Widget):
+
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.text = ""
+
+    def get(self):
+        return self.text
+
+    def insert(self, index, text):
+        i = len(self.text) if index == END else int(index)
+        self.text = self.text[:i] + text + self.text[i:]
+
+    def delete(self, first, last=None):
+        i = int(first)
+        j = len(self.text) if last == END else i + 1 if last is None else int(last)
+        self.text = self.text[:i] + self.text[j:]
+
+class Listbox(Widget):
+
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = []
+        self.selection = ()
+
+    def _index(self, index):
+        return len(self.items) if index == END else int(index)
+
+    def insert(self, index, *items):
+        i = self._index(index)
+        self.items[i:i] = items
+
+    def delete(self, first, last=None):
+        i = self._index(first)
+        j = i + 1 if last is None else self._index(last) + 1
+        del self.items[i:j]
+
+    def get(self, first, last=None):
+        if last is None:
+            return self.items[self._index(first)]
+        return tuple(self.items[self._index(first):self._index(last) + 1])
+
+    def size(self):
+        return len(self.items)
+
+    def curselection(self):
+        return self.selection
+
+    def selection_set(self, first, last=None):
+        self.selection = (self._index(first),)
+
+    def selection_clear(self, first=0, last=None):
+        self.selection = ()
+
+class Variable:
+
+    def __init__(self, master=None, value=None, name=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+class StringVar(Variable):
+    def __init__(self, master=None, value="", name=None):
+        super().__init__(master, value, name)
+
+class BooleanVar(Variable):
+    def __init__(self, master=None, value=False, name=None):
+        super().__init__(master, value, name)
+
+class IntVar(Variable):
+    def __init__(self, master=None, value=0, name=None):
+        super().__init__(master, value, name)
+
+class DoubleVar(Variable):
+    def __init__(self, master=None, value=0.0, name=None):
+        super().__init__(master, value, name)
+
+class Frame(Widget): pass
+class Label(Widget): pass
+class Button(Widget): pass
+class Checkbutton(Widget): pass
+class Radiobutton(Widget): pass
+class Scrollbar(Widget): pass
+class Text(Widget): pass
+class Canvas(Widget): pass
+class Menu(Widget): pass
+class OptionMenu(Widget):
+    def __init__(self, master, variable, value, *values, **kwargs):
+        super().__init__(master)
+
+# ---------------------------
+# Installing and loading
+# ---------------------------
+def install(mode="fake", answers=None):
+    """Make `import tkinter` safe for the apps; see the module docstring."""
+    ANSWERS.update(answers or {})
+    if mode == "fake":
+        package = types.ModuleType("tkinter")
+        package.__path__ = []
+        for name, value in globals().items():
+            if isinstance(value, (type, str)) and not name.startswith("_") and name != "ROOT":
+                setattr(package, name, value)
+        package.TkVersion = 8.6
+        sys.modules["tkinter"] = package
+        for sub, names in DIALOGS.items():
+            module = types.ModuleType(f"tkinter.{sub}")
+            for name in names:
+                setattr(module, name, _dialog(name))
+            setattr(package, sub, module)
+            sys.modules[module.__name__] = module
+    elif mode == "real":
+        import tkinter
+        from tkinter import filedialog, messagebox, simpledialog
+        if not os.environ.get("DISPLAY") and sys.platform.startswith("linux"):
+            raise RuntimeError("--tk real needs a display; run under xvfb-run")
+        tkinter.Misc.mainloop = lambda self, n=0: None
+        for module in (messagebox, filedialog, simpledialog):
+            for name in DIALOGS[module.__name__.rpartition(".")[2]]:
+                setattr(module, name, _dialog(name))
+    else:
+        raise ValueError(f"Unknown Tk mode {mode!r}; use 'fake' or 'real'")
+
+def load_app(project, module):
+    """Import `module` from the project folder (relative to the repo root)."""
+    folder = os.path.join(ROOT, project)
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+    return importlib.import_module(module)
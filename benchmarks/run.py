@@ -0,0 +1,392 @@
+"""
+Benchmarks for the hot paths of all three apps, run without a window.
+
+    python benchmarks/run.py                        # everything, compared with baseline.json
+    python benchmarks/run.py todolist --scale 0.1   # one app, smaller inputs
+    python benchmarks/run.py --save-baseline        # accept the current numbers
+    python benchmarks/run.py rps --profile cpu      # cProfile of each measured section
+    python benchmarks/run.py todolist --profile mem --profile-dir /tmp/prof
+    xvfb-run python benchmarks/run.py --tk real     # with real Tk widgets
+
+The apps are imported through headless.py and driven by calling their
+own functions, the way their buttons and key bindings do:
+
+- todolist: load_tasks() from SQLite and from the JSON snapshot,
+  save_tasks() of the JSON snapshot until the writer thread has flushed
+  it, refresh() of the whole list, apply_filter() per keystroke of a
+  search, and add_task() edits per second (at 100,000 tasks times
+  --scale).
+- voice: text_to_expression() transcripts per second and safe_eval()
+  expressions per second, with the compiled-expression cache warm (a
+  corpus that repeats, as at the keypad) and cold.
+- rps: play() rounds per second, i.e. the strategy, the history log and
+  the labels, and Game.play() alone for comparison.
+
+Each measurement calls the code until at least MIN_SAMPLE seconds are
+spent in it, and the best of --repeat such samples counts; the spread
+printed next to it (slowest sample against the best) shows how noisy the
+machine is. The results are compared
+with the stored baseline (benchmarks/baseline.json): a result that is
+slower by more than its threshold (--threshold, or a looser one for the
+measurements dominated by disk I/O) is a regression, and the exit status
+is 1. With --passes N the whole run is repeated and the median of each
+result is compared; --save-baseline does three passes unless told
+otherwise, so that one unusually fast or slow run does not become the
+reference. Baselines only compare on the same machine, --scale and --tk;
+save a new one with --save-baseline after an intended change or when
+moving to another machine.
+
+--profile cpu runs each measured section under cProfile and prints the
+functions with the most cumulative time; --profile mem traces it with
+tracemalloc and prints the peak and the largest allocation sites. With
+--profile-dir the raw data is also saved there (.prof files for
+pstats/snakeviz, .txt for tracemalloc). Profiled runs are much slower, so
+they are neither compared nor saved as a baseline.
+"""
+import argparse
+import cProfile
+import gc
+import json
+import os
+import platform
+import pstats
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager, nullcontext
+
+import headless
+
+TODO, VOICE, RPS = "Project1/TODOlist", "Project2", "Project3/RockPaperScissor"
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+THRESHOLD = 0.3     # allowed slowdown before a result counts as a regression
+IO_THRESHOLD = 0.5  # for the results that mostly wait on the disk
+MIN_SAMPLE = 0.5    # seconds; quick functions are called repeatedly to fill a sample
+
+Result = namedtuple("Result", "name value unit threshold")
+
+def higher_is_better(unit):
+    return unit.endswith("/s")
+
+# ---------------------------
+# Measuring and profiling
+# ---------------------------
+class Suite:
+    """Runs the measurements and collects their Results."""
+
+    def __init__(self, repeat=5, profile=None, profile_dir=None, top=15, threshold=THRESHOLD):
+        self.repeat = repeat
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.top = top
+        self.threshold = threshold
+        self.results = []
+
+    def time(self, name, fn, count=1, unit="ms", setup=None, threshold=None):
+        """
+        Time fn() (after setup(), which is not timed). A sample calls it
+        until at least MIN_SAMPLE seconds are spent in it, and the best of
+        `repeat` samples counts. Records count per second for units
+        ending in "/s", otherwise milliseconds per each of the `count` items.
+        """
+        if self.profile:
+            samples = [self._call(fn, setup, name)]
+        else:
+            samples = []
+            for _ in range(self.repeat):
+                calls, spent = 0, 0.0
+                while spent < MIN_SAMPLE:
+                    spent += self._call(fn, setup)
+                    calls += 1
+                samples.append(spent / calls)
+        best = min(samples)
+        value = count / best if higher_is_better(unit) else best * 1000 / count
+        result = Result(name, value, unit, threshold or self.threshold)
+        self.results.append(result)
+        spread = max(samples) / best - 1
+        print(f"  {name:<34}{value:>14,.2f} {unit:<14} spread {spread:4.0%}", flush=True)
+        return result
+
+    def _call(self, fn, setup, profile_as=None):
+        """Seconds spent in one fn() call, profiled as profile_as if given."""
+        if setup:
+            setup()
+        # what is already alive (other apps' state included) is left out of
+        # the collector's work; garbage made by fn() is still collected
+        gc.collect()
+        gc.freeze()
+        try:
+            with self.profiled(profile_as) if profile_as else nullcontext():
+                start = time.perf_counter()
+                fn()
+                return time.perf_counter() - start
+        finally:
+            gc.unfreeze()
+
+    @contextmanager
+    def profiled(self, name):
+        if self.profile == "cpu":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._report_cpu(name, profiler)
+        elif self.profile == "mem":
+            tracemalloc.start(10)
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self._report_memory(name, snapshot, peak)
+        else:
+            yield
+
+    def _report_cpu(self, name, profiler):
+        print(f"\n--- cProfile: {name} ---")
+        stats = pstats.Stats(profiler, stream=sys.stdout)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        if self.profile_dir:
+            stats.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+    def _report_memory(self, name, snapshot, peak):
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+        top = snapshot.statistics("lineno")
+        lines = [f"--- tracemalloc: {name} ---",
+                 f"peak {peak / 1e6:.1f} MB, still allocated {sum(s.size for s in top) / 1e6:.1f} MB"]
+        lines += [f"  {s.size / 1e6:8.2f} MB {s.count:>9,} blocks  {s.traceback[0]}" for s in top[:self.top]]
+        print("\n" + "\n".join(lines) + "\n")
+        if self.profile_dir:
+            with open(os.path.join(self.profile_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+VERBS = ["buy", "call", "email", "fix", "water", "review", "book", "clean", "pay", "plan"]
+NOUNS = ["plants", "report", "dentist", "car", "groceries", "invoice", "garage", "flights", "budget", "slides"]
+
+def bench_todolist(suite, scale, tmp):
+    storage = headless.load_app(TODO, "storage")
+    n = max(100, int(100_000 * scale))
+    rng = random.Random(1)
+    texts = [f"{rng.choice(VERBS)} the {rng.choice(NOUNS)} #{i}" for i in range(n)]
+    folders = {}
+    for backend in ("json", "sqlite"):
+        folders[backend] = folder = os.path.join(tmp, f"tasks-{backend}")
+        os.mkdir(folder)
+        store = storage.open_store(folder, backend)
+        store.add_many(storage.Task(text, i % 3 == 0) for i, text in enumerate(texts))
+        store.close()
+    print(f"todolist ({n:,} tasks)")
+
+    # importing runs the app's start-up: choose_folder(), load_tasks(), refresh()
+    headless.ANSWERS["askdirectory"] = folders["sqlite"]
+    app = headless.load_app(TODO, "todolist")
+
+    for backend, folder in folders.items():
+        def reopen():
+            app.todo.close()
+            app.store = storage.open_store(folder, backend)
+        suite.time(f"todolist.load_tasks.{backend}", app.load_tasks, setup=reopen, threshold=IO_THRESHOLD)
+        if backend == "json":
+            # SQLite commits every edit as it goes, so saving there is a no-op
+            def save():
+                app.save_tasks()
+                app.todo.writer.flush()
+            suite.time("todolist.save_tasks.json", save, threshold=IO_THRESHOLD)
+    # from here on the list is the one loaded from SQLite, the app's default
+
+    suite.time("todolist.refresh", app.refresh)
+
+    query = "water the plants"
+    def type_query():
+        for i in range(1, len(query) + 1):
+            app.search_entry.delete(0, "end")
+            app.search_entry.insert(0, query[:i])
+            app.apply_filter()
+    def clear_search():
+        app.search_entry.delete(0, "end")
+        app.apply_filter()
+    suite.time("todolist.apply_filter", type_query, count=len(query), unit="ms/key", setup=clear_search)
+    clear_search()
+
+    edits = max(100, int(2000 * scale))
+    def add_tasks():
+        for i in range(edits):
+            app.entry.insert(0, f"new task {i}")
+            app.add_task()
+        app.todo.writer.flush()
+    suite.time("todolist.add_task", add_tasks, count=edits, unit="edits/s", threshold=IO_THRESHOLD)
+    app.todo.close()
+
+def bench_voice(suite, scale, tmp):
+    app = headless.load_app(VOICE, "voice_calculator")
+    bench_spoken = headless.load_app(VOICE, "bench_spoken")
+    bench_calc = headless.load_app(VOICE, "bench_calc")
+    n = max(1000, int(50_000 * scale))
+    print(f"voice calculator ({n:,} transcripts and expressions)")
+
+    rng = random.Random(1)
+    transcripts = [bench_spoken.random_case(rng)[0] for _ in range(n)]
+    def parse():
+        for t in transcripts:
+            app.text_to_expression(t)
+    suite.time("voice.text_to_expression", parse, count=n, unit="transcripts/s")
+
+    def evaluate(corpus):
+        for expr in corpus:
+            try:
+                app.safe_eval(expr)
+            except (ArithmeticError, ValueError):
+                pass
+    warm = bench_calc.make_corpus(n, 2000)
+    cold = list(dict.fromkeys(bench_calc.make_corpus(n, n, seed=2)))
+    suite.time("voice.safe_eval", lambda: evaluate(warm), count=len(warm), unit="expr/s")
+    suite.time("voice.safe_eval.cold", lambda: evaluate(cold), count=len(cold), unit="expr/s",
+               setup=app.calc_engine.compile_expr.cache_clear)
+
+def bench_rps(suite, scale, tmp):
+    os.environ["RPS_HISTORY"] = os.path.join(tmp, "rps_history.bin")
+    app = headless.load_app(RPS, "rockpapersciss")
+    # mainloop() returned at once, so the module has already closed its log
+    app.history = app.HistoryLog(app.HISTORY_PATH)
+    rounds = max(1000, int(20_000 * scale))
+    print(f"rock-paper-scissors ({rounds:,} rounds)")
+
+    rng = random.Random(1)
+    moves = rng.choices(app.MOVES, (0.5, 0.3, 0.2), k=rounds)
+    def play():
+        for move in moves:
+            app.play(move)
+    suite.time("rps.play", play, count=rounds, unit="rounds/s", threshold=IO_THRESHOLD)
+    app.history.close()
+
+    game = app.Game(seed=1, strategy=app.make("markov", 1))
+    indices = [app.MOVE_INDEX[m] for m in moves]
+    def engine():
+        for move in indices:
+            game.play(move)
+    suite.time("rps.Game.play", engine, count=rounds, unit="rounds/s")
+
+BENCHMARKS = {"todolist": bench_todolist, "voice": bench_voice, "rps": bench_rps}
+
+# ---------------------------
+# Baseline
+# ---------------------------
+def environment(args):
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "system": platform.platform(terse=True), "tk": args.tk, "scale": args.scale}
+
+def medians(results):
+    """One Result per name, with the median value over the passes."""
+    by_name = {}
+    for r in results:
+        by_name.setdefault(r.name, []).append(r)
+    return [runs[0]._replace(value=statistics.median(r.value for r in runs)) for runs in by_name.values()]
+
+def save_baseline(path, env, results):
+    data = {"environment": env,
+            "results": {r.name: {"value": round(r.value, 3), "unit": r.unit} for r in results}}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+    print(f"\nbaseline saved to {path}")
+
+def compare(path, env, results):
+    """Print each result against the baseline; returns the names of the regressions."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"\nno baseline at {path}; save one with --save-baseline")
+        return []
+    recorded = baseline["environment"]
+    if (recorded["tk"], recorded["scale"]) != (env["tk"], env["scale"]):
+        print(f"\nbaseline was recorded with --tk {recorded['tk']} --scale {recorded['scale']}; not comparing")
+        return []
+    if recorded != env:
+        print(f"\nnote: baseline recorded on {recorded['system']}, Python {recorded['python']}")
+
+    regressions = []
+    print(f"\n{'':<36}{'baseline':>14}{'now':>14}{'change':>9}")
+    for r in results:
+        base = baseline["results"].get(r.name)
+        if base is None:
+            print(f"  {r.name:<34}{'-':>14}{r.value:>14,.2f}{'new':>9}")
+            continue
+        # > 0 means slower, whichever way the unit goes
+        if higher_is_better(r.unit):
+            slower = base["value"] / r.value - 1
+        else:
+            slower = r.value / base["value"] - 1
+        status = "REGRESSION" if slower > r.threshold else ""
+        if status:
+            regressions.append(r.name)
+        print(f"  {r.name:<34}{base['value']:>14,.2f}{r.value:>14,.2f}{-slower:>+9.0%}  {status}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the input sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per measurement (the best counts)")
+    parser.add_argument("--passes", type=int,
+                        help="run everything this many times and keep the median of each result "
+                             "(default: 1, or 3 with --save-baseline)")
+    parser.add_argument("--tk", choices=("fake", "real"), default="fake",
+                        help="stand-in Tk, or real Tk under a (virtual) display")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown, as a fraction (default: %(default)s)")
+    parser.add_argument("--profile", choices=("cpu", "mem"), help="cProfile or tracemalloc each measurement")
+    parser.add_argument("--profile-dir", help="also save the profiles in this folder")
+    parser.add_argument("--top", type=int, default=15, help="profile lines to print")
+    args = parser.parse_args()
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+    if args.save_baseline and (args.profile or names != list(BENCHMARKS)):
+        parser.error("--save-baseline needs a full run without --profile")
+    passes = args.passes or (3 if args.save_baseline else 1)
+    if passes < 1 or args.repeat < 1:
+        parser.error("--passes and --repeat must be at least 1")
+    if args.profile_dir:
+        os.makedirs(args.profile_dir, exist_ok=True)
+
+    try:
+        headless.install(args.tk)
+    except RuntimeError as e:
+        parser.error(str(e))
+    suite = Suite(args.repeat, args.profile, args.profile_dir, args.top, args.threshold)
+    with tempfile.TemporaryDirectory() as tmp:
+        for number in range(1 if args.profile else passes):
+            if passes > 1:
+                print(f"--- pass {number + 1} of {passes} ---")
+            for name in names:
+                BENCHMARKS[name](suite, args.scale, tempfile.mkdtemp(dir=tmp))
+
+    if args.profile:
+        return 0
+    env = environment(args)
+    results = medians(suite.results)
+    if args.save_baseline:
+        save_baseline(args.baseline, env, results)
+        return 0
+    regressions = compare(args.baseline, env, results)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())